@@ -0,0 +1,140 @@
+import numpy as np
+
+from sudoku import TECHNIQUE_NAKED_SINGLE, _HIDDEN_SINGLE_TECHNIQUES
+from units import CLASSIC_UNITS, UNIT_BLOCK, UNIT_ROW, UNIT_COLUMN
+
+""" Bitmask candidate state of a classic sudoku
+
+Cells are numbered 0 - 80 (row * 9 + column). The state of a sudoku is a
+pair of lists of 81 int: the values (0 for empty cells) and the candidates
+of every empty cell as a bitmask (bit v set for value v, 0 for filled
+cells). The functions below fill cells and remove candidates in place, and
+raise Contradiction when a cell or a unit has no candidate left. The rater,
+the portfolio solver, the solution enumerator and the interactive session
+are built on this state.
+"""
+
+# # bitmask with the bits of values 1 - 9 set
+ALL_VALUES = 0x3FE
+
+# # number of values and the values themselves for every bitmask
+NUMBER_OF_VALUES = [bin(mask).count("1") for mask in range(1024)]
+VALUES_OF_MASK = [
+    [value for value in range(1, 10) if mask & (1 << value)]
+    for mask in range(1024)]
+
+# # cells of every block, row and column, and of every unit with the
+# # technique that finds a hidden single in it, taken from CLASSIC_UNITS
+BLOCKS = [cells for kind, cells in CLASSIC_UNITS.units if kind == UNIT_BLOCK]
+ROWS = [cells for kind, cells in CLASSIC_UNITS.units if kind == UNIT_ROW]
+COLUMNS = [cells for kind, cells in CLASSIC_UNITS.units if kind == UNIT_COLUMN]
+UNITS = [(_HIDDEN_SINGLE_TECHNIQUES[kind], cells)
+         for kind, cells in CLASSIC_UNITS.units]
+
+# # cells sharing a row, column or block with every cell
+PEERS = [[int(peer) for peer in peers] for peers in CLASSIC_UNITS.peers]
+
+
+class Contradiction(Exception):
+    """ Raised when a cell or a unit has no candidate left
+    """
+    pass
+
+
+def assign(values, candidates, cell, value):
+    """ Fill a cell and remove the value from the candidates of its peers
+    """
+    bit = 1 << value
+    values[cell] = value
+    candidates[cell] = 0
+    for peer in PEERS[cell]:
+        if values[peer] == value:
+            raise Contradiction()
+        candidates[peer] &= ~bit
+
+
+def initial_state(sudoku_values):
+    """ Values and candidates of every cell of a given sudoku
+
+    Return:
+        tuple (values, candidates), lists of 81 int, 0 for empty cells
+        (values) and filled cells (candidates)
+    """
+    values = [0] * 81
+    candidates = [ALL_VALUES] * 81
+    for cell, value in enumerate(np.asarray(sudoku_values).ravel()):
+        if 1 <= value <= 9:
+            assign(values, candidates, cell, int(value))
+    return values, candidates
+
+
+def eliminate(values, candidates, cells, mask):
+    """ Remove values (bitmask) from the candidates of the given empty cells
+
+    Return:
+        True if any candidate is removed, False otherwise
+    """
+    progress = False
+    for cell in cells:
+        if values[cell] == 0 and candidates[cell] & mask:
+            candidates[cell] &= ~mask
+            if candidates[cell] == 0:
+                raise Contradiction()
+            progress = True
+    return progress
+
+
+def apply_naked_singles(values, candidates):
+    """ Fill every cell that has only one candidate
+
+    Return:
+        TECHNIQUE_NAKED_SINGLE if any cell is filled, False otherwise
+    """
+    progress = False
+    for cell in range(81):
+        if values[cell] == 0:
+            mask = candidates[cell]
+            if mask == 0:
+                raise Contradiction()
+            if NUMBER_OF_VALUES[mask] == 1:
+                assign(values, candidates, cell, VALUES_OF_MASK[mask][0])
+                progress = True
+    return progress and TECHNIQUE_NAKED_SINGLE
+
+
+def apply_hidden_single(values, candidates):
+    """ Fill one cell that is the only place for a value in a block, row or column
+
+    Return:
+        the hidden single technique of the unit, None if no cell is filled
+    """
+    for technique, cells in UNITS:
+        placed = 0
+        seen_once = 0
+        seen_twice = 0
+        for cell in cells:
+            if values[cell] == 0:
+                mask = candidates[cell]
+                seen_twice |= seen_once & mask
+                seen_once |= mask
+            else:
+                placed |= 1 << values[cell]
+        if placed | seen_once != ALL_VALUES:
+            raise Contradiction()
+        hidden_singles = seen_once & ~seen_twice
+        if hidden_singles:
+            value = VALUES_OF_MASK[hidden_singles][0]
+            bit = 1 << value
+            for cell in cells:
+                if values[cell] == 0 and candidates[cell] & bit:
+                    assign(values, candidates, cell, value)
+                    return technique
+    return None
+
+
+def propagate_singles(values, candidates):
+    """ Fill naked and hidden singles until neither makes progress
+    """
+    while apply_naked_singles(values, candidates) or \
+            apply_hidden_single(values, candidates):
+        pass
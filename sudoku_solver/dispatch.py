@@ -0,0 +1,248 @@
+import numpy as np
+import argparse
+import json
+import timeit
+
+from sudoku import solve_sudoku, validate_sudoku
+from units import CLASSIC_UNITS
+
+""" Adaptive strategy selection
+
+Cheap features of a sudoku are computed first, and the sudoku is routed to
+the cheapest strategy likely to solve it:
+    greedy -- the greedy search alone, the fallback strategy finishes the
+    sudoku if the greedy search does not
+    search -- the combinatorial search without the greedy search first
+    fast_search -- solve_sudoku_randomized (classic sudoku only)
+The thresholds of the decision can be tuned from benchmark data with
+tune_thresholds.
+"""
+
+STRATEGY_GREEDY = "greedy"
+STRATEGY_SEARCH = "search"
+STRATEGY_FAST_SEARCH = "fast_search"
+
+# # the greedy search is used if the sudoku has at least min_clues clues and
+# # naked singles fill at least min_first_round_fill of its empty cells in the
+# # first round, the fallback strategy (search or fast_search) is used
+# # otherwise, and when the greedy search does not solve the sudoku. Tuned
+# # with "python dispatch.py data/sudoku_*_in.csv": the fast search solves
+# # every classic sudoku there faster than the greedy search alone, so no
+# # sudoku meets min_clues, and variant sudoku go to the search
+DEFAULT_THRESHOLDS = {
+    "min_clues": 82,
+    "min_first_round_fill": 0.0,
+    "fallback_strategy": STRATEGY_FAST_SEARCH}
+
+
+def compute_features(sudoku_values, units=CLASSIC_UNITS):
+    """ Cheap features of a sudoku, computed without solving it
+
+    Argument:
+        sudoku_values (9x9 ndarray, required) -- given sudoku
+        units (SudokuUnits, optional) -- units of the sudoku, classic sudoku by default
+
+    Return:
+        dict with keys
+            "clues" (int) -- number of given cells
+            "candidate_counts" (list of 10 int) -- number of empty cells with
+            0, 1, ..., 9 values not appearing in any of their units
+            "mean_candidates" (float) -- mean number of such values per empty cell
+            "first_round_fill" (float) -- fraction of the empty cells with one
+            such value, i.e. filled by the first round of naked singles
+    """
+    flag_empty_cells = ((sudoku_values <= 0) | (sudoku_values >= 10)).ravel()
+
+    # # values appearing in each unit, then values excluded for each cell,
+    # # computed for all cells at once from the unit incidence matrix
+    one_hot_values = np.zeros((81, 10), dtype="i4")
+    one_hot_values[np.where(~flag_empty_cells)[0],
+                   sudoku_values.ravel()[~flag_empty_cells]] = 1
+    appeared_values = units.incidence.dot(one_hot_values) > 0
+    excluded_values = units.incidence.T.dot(appeared_values) > 0
+    number_of_candidates = 9 - excluded_values[flag_empty_cells, 1:].sum(axis=1)
+    candidate_counts = list(np.bincount(number_of_candidates, minlength=10))
+
+    number_empty_cells = int(flag_empty_cells.sum())
+    if number_empty_cells == 0:
+        mean_candidates = 0.0
+        first_round_fill = 1.0
+    else:
+        mean_candidates = float(sum(
+            count * number for count, number in enumerate(candidate_counts))) / \
+            number_empty_cells
+        first_round_fill = float(candidate_counts[1]) / number_empty_cells
+    return {
+        "clues": 81 - number_empty_cells,
+        "candidate_counts": candidate_counts,
+        "mean_candidates": mean_candidates,
+        "first_round_fill": first_round_fill}
+
+
+def choose_strategy(features, thresholds=DEFAULT_THRESHOLDS, units=CLASSIC_UNITS):
+    """ Strategy to use for a sudoku, given its features
+
+    Argument:
+        features (dict, required) -- returned from compute_features
+        thresholds (dict, optional) -- see DEFAULT_THRESHOLDS
+        units (SudokuUnits, optional) -- units of the sudoku, classic sudoku by default
+
+    Return:
+        one of STRATEGY_GREEDY, STRATEGY_SEARCH, STRATEGY_FAST_SEARCH
+    """
+    if features["clues"] >= thresholds["min_clues"] and \
+            features["first_round_fill"] >= thresholds["min_first_round_fill"]:
+        return STRATEGY_GREEDY
+    return _fallback_strategy(thresholds, units)
+
+
+def _fallback_strategy(thresholds, units=CLASSIC_UNITS):
+    """ Strategy for the sudoku the greedy search is not used for, or does not solve
+    """
+    if thresholds["fallback_strategy"] == STRATEGY_FAST_SEARCH and \
+            units is not CLASSIC_UNITS:
+        return STRATEGY_SEARCH
+    if thresholds["fallback_strategy"] == STRATEGY_GREEDY:
+        raise ValueError("The greedy search cannot be the fallback strategy")
+    return thresholds["fallback_strategy"]
+
+
+def _run_strategy(strategy, sudoku_values, units=CLASSIC_UNITS):
+    """ Solve a sudoku with the given strategy, the greedy search returns unfinished sudoku
+    """
+    if strategy == STRATEGY_GREEDY:
+        return solve_sudoku(sudoku_values, flag_combinatorial=False, units=units)
+    if strategy == STRATEGY_SEARCH:
+        return solve_sudoku(sudoku_values, flag_greedy=False, units=units)
+    if strategy == STRATEGY_FAST_SEARCH:
+        from portfolio import solve_sudoku_randomized
+        return solve_sudoku_randomized(sudoku_values, seed=0)
+    raise ValueError("Unknown strategy {}".format(strategy))
+
+
+def solve_sudoku_adaptive(sudoku_values, thresholds=DEFAULT_THRESHOLDS,
+                          units=CLASSIC_UNITS):
+    """ Sudoku solver that picks a strategy from cheap features of the sudoku
+
+    Argument:
+        sudoku_values (9x9 ndarray, required) -- given sudoku, to be solved
+        thresholds (dict, optional) -- see DEFAULT_THRESHOLDS
+        units (SudokuUnits, optional) -- units of the sudoku, classic sudoku by default
+
+    Return:
+        tuple (sudoku_values, strategy), the solution (9x9 ndarray, None if
+        there is no solution) and the strategy that returned it
+    """
+    strategy = choose_strategy(
+        compute_features(sudoku_values, units), thresholds, units)
+    if strategy == STRATEGY_GREEDY:
+        sudoku_solution = _run_strategy(strategy, sudoku_values.copy(), units)
+        if validate_sudoku(sudoku_solution, units):
+            return sudoku_solution, strategy
+        strategy = _fallback_strategy(thresholds, units)
+    return _run_strategy(strategy, sudoku_values, units), strategy
+
+
+def tune_thresholds(sudoku_filenames, strategies=(
+        STRATEGY_GREEDY, STRATEGY_SEARCH, STRATEGY_FAST_SEARCH)):
+    """ Thresholds minimizing the total solving time of benchmark sudoku puzzles
+
+    Every sudoku is solved with every strategy. The thresholds are then
+    searched among the feature values of the benchmark sudoku puzzles, and
+    the fallback strategy among the strategies other than greedy. A sudoku
+    routed to the greedy search costs the time of the greedy search, plus
+    the time of the fallback strategy if the greedy search does not solve
+    it. If the greedy strategy is not among the strategies, only the
+    thresholds that no benchmark sudoku meets are considered.
+
+    Argument:
+        sudoku_filenames (list of str, required) -- classic sudoku input files
+        strategies (sequence of str, optional) -- strategies considered, at least one other than greedy
+
+    Return:
+        tuple (thresholds, total_time), the best thresholds (see
+        DEFAULT_THRESHOLDS) and the total solving time [s] they give
+    """
+    fallback_strategies = [strategy for strategy in strategies
+                           if strategy != STRATEGY_GREEDY]
+    if not fallback_strategies:
+        raise ValueError("A strategy other than greedy is needed as fallback")
+
+    benchmark = []
+    for sudoku_filename in sudoku_filenames:
+        sudoku_input = np.loadtxt(sudoku_filename, delimiter=",", dtype="i4")
+        features = compute_features(sudoku_input)
+        solve_times = {}
+        flag_greedy_solved = False
+        for strategy in strategies:
+            start = timeit.default_timer()
+            sudoku_solution = _run_strategy(strategy, sudoku_input.copy())
+            solve_times[strategy] = timeit.default_timer() - start
+            flag_solved = sudoku_solution is not None and \
+                validate_sudoku(sudoku_solution)
+            if strategy == STRATEGY_GREEDY:
+                flag_greedy_solved = flag_solved
+            elif not flag_solved:
+                solve_times[strategy] = float("inf")
+        # # time of the greedy search, then of each fallback strategy if needed
+        greedy_times = {}
+        if STRATEGY_GREEDY in strategies:
+            for fallback_strategy in fallback_strategies:
+                greedy_times[fallback_strategy] = solve_times[STRATEGY_GREEDY]
+                if not flag_greedy_solved:
+                    greedy_times[fallback_strategy] += solve_times[fallback_strategy]
+        benchmark.append((features, solve_times, greedy_times))
+
+    if STRATEGY_GREEDY in strategies:
+        min_clues_values = sorted(set(
+            features["clues"] for features, _, _ in benchmark)) + [82]
+        min_first_round_fill_values = sorted(set(
+            features["first_round_fill"] for features, _, _ in benchmark))
+    else:
+        min_clues_values = [82]
+        min_first_round_fill_values = [0.0]
+    best_thresholds = None
+    best_total_time = None
+    for fallback_strategy in fallback_strategies:
+        for min_clues in min_clues_values:
+            for min_first_round_fill in min_first_round_fill_values:
+                thresholds = {
+                    "min_clues": min_clues,
+                    "min_first_round_fill": min_first_round_fill,
+                    "fallback_strategy": fallback_strategy}
+                total_time = 0.0
+                for features, solve_times, greedy_times in benchmark:
+                    strategy = choose_strategy(features, thresholds)
+                    if strategy == STRATEGY_GREEDY:
+                        total_time += greedy_times[fallback_strategy]
+                    else:
+                        total_time += solve_times[strategy]
+                if best_total_time is None or total_time < best_total_time:
+                    best_thresholds = thresholds
+                    best_total_time = total_time
+    return best_thresholds, best_total_time
+
+
+def load_thresholds(thresholds_filename):
+    """ Load thresholds written by "python dispatch.py <filenames> -o <thresholds_filename>"
+    """
+    with open(thresholds_filename) as thresholds_file:
+        return json.load(thresholds_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Tune the thresholds of the adaptive sudoku solver")
+    parser.add_argument(
+        "in_filenames", nargs="+", help="Benchmark sudoku input filenames")
+    parser.add_argument(
+        "-o", "--out-file", dest="out_filename",
+        help="Thresholds output filename (JSON)")
+    args = parser.parse_args()
+
+    thresholds, total_time = tune_thresholds(args.in_filenames)
+    print "Best thresholds (total time {:.0f} ms):".format(total_time * 1000)
+    print json.dumps(thresholds, indent=4, sort_keys=True)
+    if args.out_filename is not None:
+        with open(args.out_filename, "w") as thresholds_file:
+            json.dump(thresholds, thresholds_file, indent=4, sort_keys=True)
@@ -0,0 +1,381 @@
+import numpy as np
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import threading
+import timeit
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+
+from sudoku import solve_sudoku, validate_sudoku
+
+""" Load-testing harness for the sudoku solver
+
+A stream of sudoku puzzles is replayed against a target, either the library
+API (solve_sudoku called in worker threads) or a local SolverPool, in one of
+two modes:
+    closed loop -- a fixed number of requests in flight, the next request is
+    sent as soon as one completes (concurrency)
+    open loop -- requests are sent at a fixed rate, whatever the latency. The
+    latency is measured from the time a request was scheduled, so a stalled
+    target shows up as queueing delay instead of fewer requests being sent.
+The latencies are recorded in a LatencyHistogram, with the throughput and
+the resident memory, and can be exported as JSON. The peak resident memory
+reported by the system covers the whole process (loading the puzzles and
+earlier runs included), so it is reported with its value before the run,
+and the resident memory of the process is also sampled during the run.
+"""
+
+# # seconds between two samples of the resident memory during a run
+_RSS_SAMPLING_INTERVAL = 0.01
+
+TARGET_API = "api"
+TARGET_POOL = "pool"
+
+
+class LatencyHistogram(object):
+    """ Latency histogram with a bounded relative error, in the style of HdrHistogram
+
+    Latencies are recorded in microseconds. Values below 2 * 2^precision_bits
+    are counted exactly, larger values in buckets whose width is at most
+    1 / 2^precision_bits of their value, so memory stays small whatever the
+    range of latencies.
+
+    Argument:
+        precision_bits (int, optional) -- 7 by default, for a relative error below 1%
+    """
+
+    def __init__(self, precision_bits=7):
+        self.precision_bits = precision_bits
+        self._sub_buckets = 1 << precision_bits
+        self._counts = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def _bucket(self, value):
+        shift = max(0, value.bit_length() - self.precision_bits - 1)
+        return shift * self._sub_buckets + (value >> shift)
+
+    def _highest_value(self, bucket):
+        """ Highest value counted in a bucket
+        """
+        shift = max(0, bucket // self._sub_buckets - 1)
+        lowest_value = (bucket - shift * self._sub_buckets) << shift
+        return lowest_value + (1 << shift) - 1
+
+    def record(self, latency):
+        """ Record one latency
+
+        Argument:
+            latency (float, required) -- latency [s]
+        """
+        value = int(round(latency * 1e6))
+        bucket = self._bucket(value)
+        self._counts[bucket] = self._counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percentile):
+        """ Latency [us] below which the given percentage of latencies fall
+
+        Argument:
+            percentile (float, required) -- 0 - 100
+
+        Return:
+            int, the highest value of the bucket of that percentile, never above
+            the maximum recorded, 0 if nothing is recorded
+        """
+        if self.count == 0:
+            return 0
+        rank = max(1, int(np.ceil(percentile / 100.0 * self.count)))
+        cumulative_count = 0
+        for bucket in sorted(self._counts):
+            cumulative_count += self._counts[bucket]
+            if cumulative_count >= rank:
+                return min(self._highest_value(bucket), self.max)
+        return self.max
+
+    def to_dict(self):
+        """ Summary and buckets of the histogram, JSON serializable
+
+        Return:
+            dict with keys "count", "mean", "p50", "p95", "p99", "max" (latencies
+            in us) and "buckets", a list of [highest value (us), count]
+        """
+        return {
+            "count": self.count,
+            "mean": float(self.total) / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "buckets": [[self._highest_value(bucket), self._counts[bucket]]
+                        for bucket in sorted(self._counts)]}
+
+
+def load_puzzles(sudoku_filenames):
+    """ Load classic sudoku puzzles
+
+    Argument:
+        sudoku_filenames (list of str, required) -- sudoku input files
+
+    Return:
+        list of 9x9 ndarray
+    """
+    return [np.loadtxt(sudoku_filename, delimiter=",", dtype="i4")
+            for sudoku_filename in sudoku_filenames]
+
+
+def generate_corpus(sudoku_values_list, size, seed=None):
+    """ Generate puzzles by random transformations of given puzzles
+
+    Each puzzle is a copy of a given one with its digits relabelled, its
+    bands, its stacks, the rows of each band and the columns of each stack
+    shuffled, and possibly transposed. These transformations keep the
+    number of solutions and the difficulty of the puzzle.
+
+    Argument:
+        sudoku_values_list (list of 9x9 ndarray, required) -- given puzzles
+        size (int, required) -- number of puzzles to generate
+        seed (int, optional) -- seed of the transformations
+
+    Return:
+        list of 9x9 ndarray
+    """
+    rng = random.Random(seed)
+
+    def shuffled_lines():
+        bands = [0, 1, 2]
+        rng.shuffle(bands)
+        lines = []
+        for band in bands:
+            lines_of_band = [band * 3, band * 3 + 1, band * 3 + 2]
+            rng.shuffle(lines_of_band)
+            lines += lines_of_band
+        return lines
+
+    corpus = []
+    for _ in range(size):
+        sudoku_values = rng.choice(sudoku_values_list)
+        digits = range(1, 10)
+        rng.shuffle(digits)
+        relabel = np.array([0] + digits, dtype="i4")
+        flag_empty_cells = (sudoku_values <= 0) | (sudoku_values >= 10)
+        new_values = relabel[np.where(flag_empty_cells, 0, sudoku_values)]
+        new_values = new_values[shuffled_lines()][:, shuffled_lines()]
+        if rng.random() < 0.5:
+            new_values = new_values.T
+        corpus.append(np.ascontiguousarray(new_values))
+    return corpus
+
+
+def _max_rss_kb():
+    """ Peak resident memory [KB] of this process and of its waited-for children, since they started
+    """
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss}
+
+
+def _rss_kb():
+    """ Current resident memory [KB] of this process, None where /proc is not available
+    """
+    try:
+        with open("/proc/self/statm") as statm_file:
+            resident_pages = int(statm_file.read().split()[1])
+    except (IOError, OSError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+class _RssSampler(threading.Thread):
+    """ Thread keeping the highest resident memory [KB] of this process until stopped
+    """
+
+    def __init__(self):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.peak = _rss_kb()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while self.peak is not None and not self._stopped.wait(_RSS_SAMPLING_INTERVAL):
+            self.peak = max(self.peak, _rss_kb())
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        if self.peak is not None:
+            self.peak = max(self.peak, _rss_kb())
+
+
+def run_load_test(puzzles, number_of_requests, target=TARGET_API,
+                  concurrency=1, rate=None, processes=None):
+    """ Replay a stream of sudoku puzzles against a solver target
+
+    Argument:
+        puzzles (list of 9x9 ndarray, required) -- puzzles, replayed in turn
+        number_of_requests (int, required) -- number of puzzles to solve
+        target (str, optional) -- TARGET_API or TARGET_POOL
+        concurrency (int, optional) -- maximum number of requests in flight
+        rate (float, optional) -- requests per second (open loop), closed loop by default
+        processes (int, optional) -- number of SolverPool processes, default is the number of CPUs
+
+    Return:
+        dict with the settings, "requests", "errors" (puzzles not solved),
+        "duration" [s], "throughput" [requests/s], "latency_us" (see
+        LatencyHistogram.to_dict), "max_rss_kb" (peaks over the lifetime of
+        the process: "self", "self_before_run" and "children", the pool
+        workers once closed) and "run_max_rss_kb" (highest resident memory
+        of this process sampled during the run, None without /proc)
+    """
+    max_rss_kb_before_run = _max_rss_kb()["self"]
+    if target == TARGET_API:
+        pool = None
+
+        def solve(sudoku_values):
+            return solve_sudoku(sudoku_values.copy())
+    elif target == TARGET_POOL:
+        from solver_pool import SolverPool
+        pool = SolverPool(processes=processes, slots=concurrency)
+
+        def solve(sudoku_values):
+            return pool.submit(sudoku_values).result()
+    else:
+        raise ValueError("Unknown target {}".format(target))
+
+    histogram = LatencyHistogram()
+    lock = threading.Lock()
+    errors = [0]
+    request_queue = Queue()
+
+    def worker():
+        while True:
+            request = request_queue.get()
+            if request is None:
+                break
+            sudoku_values, scheduled_time = request
+            if scheduled_time is None:
+                scheduled_time = timeit.default_timer()
+            try:
+                sudoku_solution = solve(sudoku_values)
+                solved = sudoku_solution is not None and \
+                    validate_sudoku(sudoku_solution)
+            except Exception:
+                solved = False
+            latency = timeit.default_timer() - scheduled_time
+            with lock:
+                histogram.record(latency)
+                if not solved:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    rss_sampler = _RssSampler()
+    rss_sampler.start()
+    start = timeit.default_timer()
+    try:
+        for request_number in range(number_of_requests):
+            sudoku_values = puzzles[request_number % len(puzzles)]
+            if rate is None:
+                # # closed loop: the workers take the next puzzle when they are free
+                request_queue.put((sudoku_values, None))
+            else:
+                scheduled_time = start + request_number / float(rate)
+                delay = scheduled_time - timeit.default_timer()
+                if delay > 0:
+                    threading.Event().wait(delay)
+                request_queue.put((sudoku_values, scheduled_time))
+        for _ in threads:
+            request_queue.put(None)
+        for thread in threads:
+            thread.join()
+        duration = timeit.default_timer() - start
+    finally:
+        rss_sampler.stop()
+        if pool is not None:
+            pool.close()
+    max_rss_kb = _max_rss_kb()
+    max_rss_kb["scope"] = "process"
+    max_rss_kb["self_before_run"] = max_rss_kb_before_run
+
+    return {
+        "target": target,
+        "mode": "closed_loop" if rate is None else "open_loop",
+        "concurrency": concurrency,
+        "rate": rate,
+        "requests": number_of_requests,
+        "errors": errors[0],
+        "duration": duration,
+        "throughput": number_of_requests / duration,
+        "latency_us": histogram.to_dict(),
+        "max_rss_kb": max_rss_kb,
+        "run_max_rss_kb": rss_sampler.peak,
+        "python": platform.python_version(),
+        "numpy": np.__version__}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load test of the sudoku solver")
+    parser.add_argument(
+        "in_filenames", nargs="+", help="Sudoku input filenames")
+    parser.add_argument(
+        "-n", "--requests", dest="number_of_requests", type=int, default=1000,
+        help="Number of puzzles to solve (default: 1000)")
+    parser.add_argument(
+        "-t", "--target", choices=[TARGET_API, TARGET_POOL], default=TARGET_API,
+        help="Solve with the library API in threads, or with a SolverPool")
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=1,
+        help="Maximum number of requests in flight (default: 1)")
+    parser.add_argument(
+        "-r", "--rate", type=float,
+        help="Requests per second (open loop), closed loop by default")
+    parser.add_argument(
+        "-p", "--processes", type=int,
+        help="Number of SolverPool processes (default: number of CPUs)")
+    parser.add_argument(
+        "-g", "--generate", dest="corpus_size", type=int,
+        help="Replay this many puzzles generated from the input files")
+    parser.add_argument(
+        "--seed", type=int, help="Seed of the generated puzzles")
+    parser.add_argument(
+        "-o", "--out-file", dest="out_filename",
+        help="Results output filename (JSON)")
+    args = parser.parse_args()
+
+    puzzles = load_puzzles(args.in_filenames)
+    if args.corpus_size is not None:
+        puzzles = generate_corpus(puzzles, args.corpus_size, args.seed)
+    results = run_load_test(
+        puzzles, args.number_of_requests, target=args.target,
+        concurrency=args.concurrency, rate=args.rate, processes=args.processes)
+
+    latency = results["latency_us"]
+    print "{} requests in {:.2f} s ({:.1f} requests/s), {} errors".format(
+        results["requests"], results["duration"], results["throughput"],
+        results["errors"])
+    print "latency [ms]: p50 {:.2f}, p95 {:.2f}, p99 {:.2f}, max {:.2f}".format(
+        latency["p50"] / 1000.0, latency["p95"] / 1000.0,
+        latency["p99"] / 1000.0, latency["max"] / 1000.0)
+    if results["run_max_rss_kb"] is not None:
+        print "max RSS during the run [MB]: {:.1f}".format(
+            results["run_max_rss_kb"] / 1024.0)
+    print "max RSS of the process [MB]: {:.1f}, {:.1f} before the run (workers {:.1f})".format(
+        results["max_rss_kb"]["self"] / 1024.0,
+        results["max_rss_kb"]["self_before_run"] / 1024.0,
+        results["max_rss_kb"]["children"] / 1024.0)
+    if args.out_filename is not None:
+        with open(args.out_filename, "w") as out_file:
+            json.dump(results, out_file, indent=4, sort_keys=True)
@@ -0,0 +1,235 @@
+import numpy as np
+import argparse
+import multiprocessing
+import random
+import timeit
+try:
+    from Queue import Empty
+except ImportError:
+    from queue import Empty
+
+from sudoku import solve_sudoku, validate_sudoku
+from bitmasks import (
+    NUMBER_OF_VALUES, VALUES_OF_MASK, Contradiction, assign, initial_state,
+    propagate_singles)
+
+""" Portfolio solver
+
+Several strategies are started in parallel worker processes on the same
+sudoku. The first valid solution is returned and the other workers are
+terminated, so the solving time is bounded by the fastest strategy for each
+sudoku.
+"""
+
+
+class _NodeLimitReached(Exception):
+    """ Raised when a randomized search has used up its branches before a restart
+    """
+    pass
+
+
+def _randomized_search(values, candidates, rng, budget):
+    """ Depth first search with singles propagation and random branching
+
+    The cell to branch on is picked at random among the cells with the fewest
+    candidates, and its candidates are tried in random order.
+
+    Return:
+        values (list of 81 int) of the solution, None if there is no solution
+    """
+    try:
+        propagate_singles(values, candidates)
+    except Contradiction:
+        return None
+    if 0 not in values:
+        return values
+
+    fewest = min(NUMBER_OF_VALUES[candidates[cell]]
+                 for cell in range(81) if values[cell] == 0)
+    cell = rng.choice([
+        cell for cell in range(81)
+        if values[cell] == 0 and NUMBER_OF_VALUES[candidates[cell]] == fewest])
+    branch_values = list(VALUES_OF_MASK[candidates[cell]])
+    rng.shuffle(branch_values)
+    for value in branch_values:
+        if budget[0] == 0:
+            raise _NodeLimitReached()
+        budget[0] -= 1
+        new_values = list(values)
+        new_candidates = list(candidates)
+        try:
+            assign(new_values, new_candidates, cell, value)
+        except Contradiction:
+            continue
+        solution = _randomized_search(new_values, new_candidates, rng, budget)
+        if solution is not None:
+            return solution
+    return None
+
+
+def solve_sudoku_randomized(sudoku_values, seed=None, initial_node_limit=64):
+    """ Sudoku solver with randomized branching order and restarts
+
+    Algorithm:
+        Fill naked and hidden singles, then branch on a random cell among the
+        most constrained ones, trying its candidates in random order. If the
+        search enters more branches than the node limit, restart it from the
+        given sudoku with a new random order and a doubled node limit.
+
+    Argument:
+        sudoku_values (9x9 ndarray, required) -- given sudoku, to be solved
+        seed (int, optional) -- seed of the random branching order
+        initial_node_limit (int, optional) -- number of branches before the first restart
+
+    Return:
+        sudoku_values (9x9 ndarray) of the solution, None if there is no solution
+    """
+    rng = random.Random(seed)
+    try:
+        values, candidates = initial_state(sudoku_values)
+    except Contradiction:
+        return None
+
+    node_limit = initial_node_limit
+    while True:
+        try:
+            solution = _randomized_search(
+                list(values), list(candidates), rng, [node_limit])
+        except _NodeLimitReached:
+            node_limit *= 2
+            continue
+        if solution is None:
+            return None
+        return np.array(solution, dtype="i4").reshape((9, 9))
+
+
+def _solve_greedy_search(sudoku_values):
+    return solve_sudoku(sudoku_values)
+
+
+def _solve_search(sudoku_values):
+    return solve_sudoku(sudoku_values, flag_greedy=False)
+
+
+def _solve_randomized_seed_0(sudoku_values):
+    return solve_sudoku_randomized(sudoku_values, seed=0)
+
+
+def _solve_randomized_seed_1(sudoku_values):
+    return solve_sudoku_randomized(sudoku_values, seed=1)
+
+
+# # strategies raced by default, as (name, solver function)
+DEFAULT_STRATEGIES = (
+    ("greedy_search", _solve_greedy_search),
+    ("search", _solve_search),
+    ("randomized_seed_0", _solve_randomized_seed_0),
+    ("randomized_seed_1", _solve_randomized_seed_1))
+
+
+# # seconds between two checks that the workers are still running
+_POLL_INTERVAL = 0.1
+
+
+def _run_strategy(name, solver, sudoku_values, result_queue):
+    """ Run one strategy in a worker process and report its solution
+
+    A strategy that raises reports no solution, so that the race does not
+    wait for it.
+    """
+    try:
+        sudoku_solution = solver(sudoku_values)
+    except Exception:
+        sudoku_solution = None
+    result_queue.put((name, sudoku_solution))
+
+
+def solve_sudoku_portfolio(sudoku_values, strategies=DEFAULT_STRATEGIES,
+                           timeout=None):
+    """ Race several sudoku solvers and return the first valid solution
+
+    Argument:
+        sudoku_values (9x9 ndarray, required) -- given sudoku, to be solved
+        strategies (sequence of (str, callable), optional) -- strategy names and solver functions
+        timeout (float, optional) -- seconds to wait for a solution, no limit by default
+
+    Return:
+        tuple (sudoku_values, name), the first valid solution (9x9 ndarray)
+        and the name of the strategy that found it, (None, None) if no
+        strategy finds a valid solution
+    """
+    result_queue = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=_run_strategy,
+            args=(name, solver, sudoku_values.copy(), result_queue))
+        for name, solver in strategies]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+
+    deadline = None if timeout is None else timeit.default_timer() + timeout
+    winner = (None, None)
+    number_of_results = 0
+    try:
+        while number_of_results < len(workers):
+            # # a worker killed from outside (e.g. out of memory) never
+            # # reports, so stop waiting once every worker has exited
+            flag_workers_exited = not any(worker.is_alive() for worker in workers)
+            wait = _POLL_INTERVAL
+            if deadline is not None:
+                wait = min(wait, max(deadline - timeit.default_timer(), 0))
+            try:
+                name, sudoku_solution = result_queue.get(timeout=wait)
+            except Empty:
+                if flag_workers_exited or (
+                        deadline is not None and
+                        timeit.default_timer() >= deadline):
+                    break
+                continue
+            number_of_results += 1
+            if sudoku_solution is not None and validate_sudoku(sudoku_solution):
+                winner = (sudoku_solution, name)
+                break
+    finally:
+        # # cancel the strategies still running
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+    return winner
+
+
+def benchmark_portfolio(sudoku_filenames, strategies=DEFAULT_STRATEGIES):
+    """ Count how often each strategy wins the race
+
+    Argument:
+        sudoku_filenames (list of str, required) -- sudoku input files
+        strategies (sequence of (str, callable), optional) -- strategy names and solver functions
+
+    Return:
+        dict from strategy name to its win rate (fraction of the sudoku
+        puzzles), the key None counts the puzzles that no strategy solved
+    """
+    wins = dict((name, 0) for name, _ in strategies)
+    wins[None] = 0
+    for sudoku_filename in sudoku_filenames:
+        sudoku_values = np.loadtxt(sudoku_filename, delimiter=",", dtype="i4")
+        _, name = solve_sudoku_portfolio(sudoku_values, strategies)
+        wins[name] += 1
+    return dict((name, float(number_of_wins) / len(sudoku_filenames))
+                for name, number_of_wins in wins.items())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Win rates of the portfolio solver strategies")
+    parser.add_argument(
+        "in_filenames", nargs="+", help="Sudoku input filenames")
+    args = parser.parse_args()
+
+    win_rates = benchmark_portfolio(args.in_filenames)
+    for name, _ in DEFAULT_STRATEGIES:
+        print "{}: {:.1%}".format(name, win_rates[name])
+    if win_rates[None] > 0:
+        print "unsolved: {:.1%}".format(win_rates[None])
@@ -0,0 +1,307 @@
+import argparse
+import cProfile
+import pstats
+import resource
+import sys
+import timeit
+try:
+    import tracemalloc
+except ImportError:
+    # # tracemalloc is in the standard library from Python 3.4, and
+    # # provided for Python 2.7 by pytracemalloc (on a patched interpreter)
+    tracemalloc = None
+
+import sudoku
+from sudoku import PROPAGATION_FULL, solve_sudoku
+from units import CLASSIC_UNITS, load_sudoku
+
+""" Profiling mode of the sudoku solver
+
+Every sudoku is solved twice. The first run is under cProfile, for the usual
+table of functions. The second run is under a profile hook that keeps the
+call stack (Python functions and the C functions they call, numpy
+included), and charges the time and the memory allocated between two
+events to the stack at that time:
+    - as collapsed stacks ("a;b;c <weight>" lines), the input format of
+    flamegraph.pl and of most flamegraph viewers
+    - to the solver phase of the innermost phase function on the stack, so
+    that the phases add up to the total:
+        greedy -- solve_sudoku_greedy
+        candidates -- exclude_values_appeared_in_same_row_column_block
+        hidden_singles -- _find_values_infeasible_for_specified_rows_columns
+        search -- solve_sudoku_combinatorial (branching, copies, propagation
+        other than the phases above)
+        other -- anything else, e.g. solve_sudoku and validate_sudoku
+Allocations are measured with tracemalloc: the memory allocated is the sum
+of the increases of the traced memory between two events (so memory
+allocated and freed again within one C call is not seen), and the peak is
+the highest traced memory reached while the phase runs: when the peak
+traced by tracemalloc has risen since the last event, e.g. on a temporary
+array freed within the same numpy call, it is charged to the phase running.
+Without tracemalloc, only the time and the peak resident memory of the
+process are reported.
+The profile hook slows the solver down, the times are for comparison only.
+"""
+
+PHASE_GREEDY = "greedy"
+PHASE_CANDIDATES = "candidates"
+PHASE_HIDDEN_SINGLES = "hidden_singles"
+PHASE_SEARCH = "search"
+PHASE_OTHER = "other"
+PHASES = (PHASE_GREEDY, PHASE_CANDIDATES, PHASE_HIDDEN_SINGLES, PHASE_SEARCH,
+          PHASE_OTHER)
+
+# # phase of the code of the phase functions
+_PHASE_OF_CODE = {
+    sudoku.solve_sudoku_greedy.__code__: PHASE_GREEDY,
+    sudoku.exclude_values_appeared_in_same_row_column_block.__code__:
+        PHASE_CANDIDATES,
+    sudoku._find_values_infeasible_for_specified_rows_columns.__code__:
+        PHASE_HIDDEN_SINGLES,
+    sudoku.solve_sudoku_combinatorial.__code__: PHASE_SEARCH}
+
+METRIC_TIME = "time"
+METRIC_MEMORY = "memory"
+
+
+def _c_function_label(function):
+    """ Label of a C function in the collapsed stacks, e.g. numpy.core.multiarray:where
+    """
+    module = getattr(function, "__module__", None)
+    if module is None and getattr(function, "__self__", None) is not None:
+        module = type(function.__self__).__name__
+    return "{}:{}".format(module, function.__name__)
+
+
+class SolverProfiler(object):
+    """ Profile of the sudoku solver, accumulated over the sudoku puzzles solved
+
+    Argument:
+        trace_memory (bool, optional) -- measure allocations with tracemalloc if it is available, True by default
+
+    Attributes:
+        phases -- dict from phase to a dict with keys "time" [s], "calls",
+        "allocated" and "peak" [bytes] (None without tracemalloc)
+        stack_times -- dict from collapsed stack to time [s]
+        stack_allocations -- dict from collapsed stack to memory allocated [bytes]
+        number_of_puzzles -- number of sudoku puzzles solved
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory and tracemalloc is not None
+        self.phases = dict(
+            (phase, {"time": 0.0, "calls": 0,
+                     "allocated": 0 if self.trace_memory else None,
+                     "peak": 0 if self.trace_memory else None})
+            for phase in PHASES)
+        self.stack_times = {}
+        self.stack_allocations = {}
+        self.number_of_puzzles = 0
+        self._stats = None
+
+    def solve(self, sudoku_values, flag_greedy=True, flag_combinatorial=True,
+              units=CLASSIC_UNITS, propagation=PROPAGATION_FULL):
+        """ Solve a sudoku with solve_sudoku and add it to the profile
+
+        Argument:
+            sudoku_values (9x9 ndarray, required) -- given sudoku, to be solved
+            flag_greedy, flag_combinatorial, units, propagation -- see solve_sudoku
+
+        Return:
+            sudoku_values (9x9 ndarray), as returned by solve_sudoku
+        """
+        def run():
+            return solve_sudoku(
+                sudoku_values.copy(), flag_greedy=flag_greedy,
+                flag_combinatorial=flag_combinatorial, units=units,
+                propagation=propagation)
+
+        profile = cProfile.Profile()
+        profile.runcall(run)
+        if self._stats is None:
+            self._stats = pstats.Stats(profile)
+        else:
+            self._stats.add(profile)
+
+        if self.trace_memory:
+            tracemalloc.start()
+        try:
+            sudoku_solution = self._run_with_stack_hook(run)
+        finally:
+            if self.trace_memory:
+                tracemalloc.stop()
+        self.number_of_puzzles += 1
+        return sudoku_solution
+
+    def _run_with_stack_hook(self, run):
+        """ Run the solver under the profile hook that charges the collapsed stacks and phases
+        """
+        timer = timeit.default_timer
+        trace_memory = self.trace_memory
+        phases = self.phases
+        stack_times = self.stack_times
+        stack_allocations = self.stack_allocations
+
+        # # one entry per function on the stack: (collapsed stack, phase)
+        stack = [("solve", PHASE_OTHER)]
+        state = {"last_time": None, "last_memory": 0, "last_peak": 0}
+
+        def hook(frame, event, arg):
+            now = timer()
+            key, phase = stack[-1]
+            stack_times[key] = stack_times.get(key, 0.0) + now - state["last_time"]
+            phases[phase]["time"] += now - state["last_time"]
+            if trace_memory:
+                memory, peak = tracemalloc.get_traced_memory()
+                allocated = memory - state["last_memory"]
+                if allocated > 0:
+                    stack_allocations[key] = stack_allocations.get(key, 0) + allocated
+                    phases[phase]["allocated"] += allocated
+                if peak > state["last_peak"]:
+                    # # the peak was reached since the last event, within this phase
+                    memory = peak
+                phases[phase]["peak"] = max(phases[phase]["peak"], memory)
+
+            if event == "call":
+                code = frame.f_code
+                new_phase = _PHASE_OF_CODE.get(code, phase)
+                if code in _PHASE_OF_CODE:
+                    phases[new_phase]["calls"] += 1
+                stack.append((
+                    "{};{}:{}".format(key, frame.f_globals.get("__name__"),
+                                      code.co_name),
+                    new_phase))
+            elif event == "c_call":
+                stack.append(("{};{}".format(key, _c_function_label(arg)), phase))
+            elif len(stack) > 1:
+                # # return, c_return or c_exception
+                stack.pop()
+            # # the time and the allocations of the hook itself are not charged
+            if trace_memory:
+                state["last_memory"], state["last_peak"] = \
+                    tracemalloc.get_traced_memory()
+            state["last_time"] = timer()
+
+        state["last_time"] = timer()
+        if trace_memory:
+            state["last_memory"], state["last_peak"] = tracemalloc.get_traced_memory()
+        sys.setprofile(hook)
+        try:
+            sudoku_solution = run()
+        finally:
+            sys.setprofile(None)
+        return sudoku_solution
+
+    def summary(self):
+        """ Summary of the profile
+
+        Return:
+            dict with keys "number_of_puzzles", "total_time" [s], "phases"
+            (see the attribute), "peak_rss_kb" (peak resident memory of the
+            process) and "functions", the 20 functions with the most time
+            of their own under cProfile, as dicts with keys "function",
+            "calls", "own_time" and "cumulative_time" [s]
+        """
+        functions = []
+        if self._stats is not None:
+            for (filename, line, name), (_, calls, own_time, cumulative_time, _) in \
+                    sorted(self._stats.stats.items(),
+                           key=lambda item: -item[1][2])[:20]:
+                functions.append({
+                    "function": "{}:{}({})".format(filename, line, name),
+                    "calls": calls,
+                    "own_time": own_time,
+                    "cumulative_time": cumulative_time})
+        return {
+            "number_of_puzzles": self.number_of_puzzles,
+            "total_time": sum(phase["time"] for phase in self.phases.values()),
+            "phases": self.phases,
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "functions": functions}
+
+    def write_flamegraph(self, flamegraph_filename, metric=METRIC_TIME):
+        """ Write the collapsed stacks, one "a;b;c <weight>" line per stack
+
+        Argument:
+            flamegraph_filename (str, required) -- output filename
+            metric (str, optional) -- METRIC_TIME (weights in us) or METRIC_MEMORY (weights in bytes allocated)
+        """
+        if metric == METRIC_TIME:
+            weights = dict((key, int(round(time * 1e6)))
+                           for key, time in self.stack_times.items())
+        elif metric == METRIC_MEMORY:
+            if not self.trace_memory:
+                raise ValueError("Memory is not traced, tracemalloc is not available")
+            weights = self.stack_allocations
+        else:
+            raise ValueError("Unknown metric {}".format(metric))
+        with open(flamegraph_filename, "w") as flamegraph_file:
+            for key in sorted(weights):
+                if weights[key] > 0:
+                    flamegraph_file.write("{} {}\n".format(key, weights[key]))
+
+    def write_pstats(self, pstats_filename):
+        """ Write the cProfile statistics, to be read with pstats or snakeviz
+        """
+        self._stats.dump_stats(pstats_filename)
+
+
+def print_summary(summary):
+    """ Print the summary returned by SolverProfiler.summary
+    """
+    total_time = summary["total_time"]
+    print "{} sudoku, {:.1f} ms under the profile hook, peak RSS {:.1f} MB".format(
+        summary["number_of_puzzles"], total_time * 1000,
+        summary["peak_rss_kb"] / 1024.0)
+    print "{:<16}{:>10}{:>8}{:>10}{:>16}{:>12}".format(
+        "phase", "time [ms]", "time", "calls", "allocated [MB]", "peak [MB]")
+    for phase in PHASES:
+        statistics = summary["phases"][phase]
+        if statistics["allocated"] is None:
+            allocated = peak = "-"
+        else:
+            allocated = "{:.2f}".format(statistics["allocated"] / 1048576.0)
+            peak = "{:.2f}".format(statistics["peak"] / 1048576.0)
+        print "{:<16}{:>10.1f}{:>8.1%}{:>10}{:>16}{:>12}".format(
+            phase, statistics["time"] * 1000,
+            statistics["time"] / total_time if total_time > 0 else 0.0,
+            statistics["calls"], allocated, peak)
+    print "functions with the most time of their own (cProfile):"
+    for function in summary["functions"][:10]:
+        print "  {:>8.1f} ms {:>8} calls  {}".format(
+            function["own_time"] * 1000, function["calls"], function["function"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Profile the time and allocations of the sudoku solver")
+    parser.add_argument(
+        "in_filenames", nargs="+", help="Sudoku input filenames")
+    parser.add_argument(
+        "-f", "--flamegraph", dest="flamegraph_filename",
+        help="Collapsed stacks output filename, for flamegraph.pl")
+    parser.add_argument(
+        "-m", "--metric", choices=[METRIC_TIME, METRIC_MEMORY], default=METRIC_TIME,
+        help="Weight of the collapsed stacks (default: time)")
+    parser.add_argument(
+        "--pstats", dest="pstats_filename",
+        help="cProfile statistics output filename")
+    parser.add_argument(
+        "--propagation", choices=sudoku.PROPAGATION_LEVELS, default=PROPAGATION_FULL,
+        help="Propagation at every node of the combinatorial search (default: full)")
+    args = parser.parse_args()
+
+    if tracemalloc is None:
+        if args.metric == METRIC_MEMORY:
+            print "ERROR! tracemalloc is not available, allocations cannot be measured!"
+            sys.exit()
+        print "tracemalloc is not available, allocations are not measured"
+    profiler = SolverProfiler()
+    for sudoku_filename in args.in_filenames:
+        sudoku_values, units = load_sudoku(sudoku_filename)
+        profiler.solve(sudoku_values, units=units, propagation=args.propagation)
+    print_summary(profiler.summary())
+    if args.flamegraph_filename is not None:
+        profiler.write_flamegraph(args.flamegraph_filename, args.metric)
+    if args.pstats_filename is not None:
+        profiler.write_pstats(args.pstats_filename)
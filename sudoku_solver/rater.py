@@ -0,0 +1,226 @@
+import numpy as np
+import argparse
+import math
+import multiprocessing
+
+from sudoku import (
+    TECHNIQUE_NAKED_SINGLE, TECHNIQUE_HIDDEN_SINGLE_BLOCK,
+    TECHNIQUE_HIDDEN_SINGLE_ROW, TECHNIQUE_HIDDEN_SINGLE_COLUMN,
+    TECHNIQUE_SEARCH)
+from bitmasks import (
+    BLOCKS, ROWS, COLUMNS, UNITS, NUMBER_OF_VALUES, VALUES_OF_MASK,
+    Contradiction, assign, initial_state, eliminate,
+    apply_naked_singles, apply_hidden_single)
+
+""" Difficulty rater based on a ladder of solving techniques
+
+The sudoku is solved with the weakest technique that makes progress, starting
+again from the weakest one after every step. The grade is the level of the
+hardest technique needed, plus log2(1 + number of search branches) if the
+techniques are not enough and a search is needed.
+
+The candidates of each cell are kept as bitmasks (see bitmasks.py), so that
+thousands of sudoku puzzles can be rated per second.
+"""
+
+TECHNIQUE_LOCKED_CANDIDATES = "locked_candidates"
+TECHNIQUE_NAKED_PAIR = "naked_pair"
+
+TECHNIQUE_LEVELS = {
+    TECHNIQUE_NAKED_SINGLE: 1,
+    TECHNIQUE_HIDDEN_SINGLE_BLOCK: 2,
+    TECHNIQUE_HIDDEN_SINGLE_ROW: 2,
+    TECHNIQUE_HIDDEN_SINGLE_COLUMN: 2,
+    TECHNIQUE_LOCKED_CANDIDATES: 3,
+    TECHNIQUE_NAKED_PAIR: 4,
+    TECHNIQUE_SEARCH: 5}
+
+# # intersections of a block with a row or column: (intersection cells,
+# # other cells of the block, other cells of the row or column)
+_INTERSECTIONS = [
+    ([cell for cell in block_cells if cell in line_cells],
+     [cell for cell in block_cells if cell not in line_cells],
+     [cell for cell in line_cells if cell not in block_cells])
+    for block_cells in BLOCKS
+    for line_cells in ROWS + COLUMNS
+    if set(block_cells) & set(line_cells)]
+
+
+def _apply_locked_candidates(values, candidates):
+    """ Remove candidates using values locked in the intersection of a block
+    and a row or column (pointing and claiming)
+    """
+    progress = False
+    for intersection, block_rest, line_rest in _INTERSECTIONS:
+        in_intersection = 0
+        for cell in intersection:
+            if values[cell] == 0:
+                in_intersection |= candidates[cell]
+        if not in_intersection:
+            continue
+        in_block_rest = 0
+        for cell in block_rest:
+            if values[cell] == 0:
+                in_block_rest |= candidates[cell]
+        in_line_rest = 0
+        for cell in line_rest:
+            if values[cell] == 0:
+                in_line_rest |= candidates[cell]
+        # # pointing: within the block, the value is only in the intersection
+        pointing = in_intersection & ~in_block_rest & in_line_rest
+        if pointing:
+            progress |= eliminate(values, candidates, line_rest, pointing)
+        # # claiming: within the row or column, the value is only in the intersection
+        claiming = in_intersection & ~in_line_rest & in_block_rest
+        if claiming:
+            progress |= eliminate(values, candidates, block_rest, claiming)
+    return progress and TECHNIQUE_LOCKED_CANDIDATES
+
+
+def _apply_naked_pairs(values, candidates):
+    """ Remove candidates using two cells of a unit with the same two candidates
+    """
+    progress = False
+    for _, cells in UNITS:
+        pairs = {}
+        for cell in cells:
+            if values[cell] == 0 and NUMBER_OF_VALUES[candidates[cell]] == 2:
+                pairs.setdefault(candidates[cell], []).append(cell)
+        for mask, pair_cells in pairs.items():
+            if len(pair_cells) == 2:
+                progress |= eliminate(
+                    values, candidates,
+                    [cell for cell in cells if cell not in pair_cells], mask)
+    return progress and TECHNIQUE_NAKED_PAIR
+
+
+# # techniques from the weakest to the strongest
+_LADDER = (
+    apply_naked_singles,
+    apply_hidden_single,
+    _apply_locked_candidates,
+    _apply_naked_pairs)
+
+
+def _solve_with_ladder(values, candidates, statistics):
+    """ Solve with the weakest techniques first, then search
+
+    Return:
+        values (list of 81 int) of the solution, None if there is no solution
+    """
+    try:
+        while 0 in values:
+            for apply_technique in _LADDER:
+                technique = apply_technique(values, candidates)
+                if technique:
+                    if TECHNIQUE_LEVELS[technique] > statistics["level"]:
+                        statistics["level"] = TECHNIQUE_LEVELS[technique]
+                        statistics["technique"] = technique
+                    break
+            else:
+                break
+    except Contradiction:
+        return None
+    if 0 not in values:
+        return values
+
+    # # no technique makes progress, branch on the most constrained cell
+    statistics["level"] = TECHNIQUE_LEVELS[TECHNIQUE_SEARCH]
+    statistics["technique"] = TECHNIQUE_SEARCH
+    empty_cells = [cell for cell in range(81) if values[cell] == 0]
+    cell = min(empty_cells, key=lambda cell: NUMBER_OF_VALUES[candidates[cell]])
+    for value in VALUES_OF_MASK[candidates[cell]]:
+        statistics["branches"] += 1
+        new_values = list(values)
+        new_candidates = list(candidates)
+        try:
+            assign(new_values, new_candidates, cell, value)
+        except Contradiction:
+            continue
+        solution = _solve_with_ladder(new_values, new_candidates, statistics)
+        if solution is not None:
+            return solution
+    return None
+
+
+def rate_sudoku(sudoku_values):
+    """ Rate the difficulty of a sudoku
+
+    Argument:
+        sudoku_values (9x9 ndarray, required) -- given sudoku, values other than 1 - 9 are empty cells
+
+    Return:
+        dict with keys
+            "grade" (float) -- level of the hardest technique needed, plus
+            log2(1 + branches) when a search is needed, None if there is no solution
+            "hardest_technique" (str) -- hardest technique needed
+            "branches" (int) -- number of search branches entered
+            "solution" (9x9 ndarray) -- solution, None if there is no solution
+    """
+    statistics = {"level": 0, "technique": None, "branches": 0}
+    solution = None
+    try:
+        values, candidates = initial_state(sudoku_values)
+    except Contradiction:
+        pass
+    else:
+        solution = _solve_with_ladder(values, candidates, statistics)
+
+    if solution is None:
+        grade = None
+    else:
+        grade = statistics["level"] + math.log(1 + statistics["branches"], 2)
+        solution = np.array(solution, dtype="i4").reshape((9, 9))
+    return {
+        "grade": grade,
+        "hardest_technique": statistics["technique"],
+        "branches": statistics["branches"],
+        "solution": solution}
+
+
+def _rate_sudoku_file(sudoku_filename):
+    """ Rate the sudoku in a csv file, called in the worker processes
+    """
+    sudoku_values = np.loadtxt(sudoku_filename, delimiter=",", dtype="i4")
+    rating = rate_sudoku(sudoku_values)
+    del rating["solution"]
+    return sudoku_filename, rating
+
+
+def rate_sudoku_files(sudoku_filenames, processes=None, chunksize=64):
+    """ Rate many sudoku csv files in parallel
+
+    Argument:
+        sudoku_filenames (list of str, required) -- sudoku input files
+        processes (int, optional) -- number of worker processes, default is the number of CPUs
+        chunksize (int, optional) -- number of files sent to a worker at a time
+
+    Return:
+        generator of tuples (sudoku_filename, rating) in the input order, where
+        rating is the same as rate_sudoku without the "solution" key
+    """
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap(_rate_sudoku_file, sudoku_filenames, chunksize):
+            yield result
+    finally:
+        pool.terminate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sudoku difficulty rater")
+    parser.add_argument(
+        "in_filenames", nargs="+", help="Sudoku input filenames")
+    parser.add_argument(
+        "-p", "--processes", dest="processes", type=int,
+        help="Number of worker processes (default: number of CPUs)")
+    args = parser.parse_args()
+
+    for sudoku_filename, rating in rate_sudoku_files(
+            args.in_filenames, processes=args.processes):
+        if rating["grade"] is None:
+            print "{}: no solution".format(sudoku_filename)
+        else:
+            print "{}: grade {:.2f}, hardest technique {}, {} branches".format(
+                sudoku_filename, rating["grade"],
+                rating["hardest_technique"], rating["branches"])
@@ -0,0 +1,260 @@
+import numpy as np
+
+from sudoku import TECHNIQUE_NAKED_SINGLE
+from bitmasks import BLOCKS, UNITS, ALL_VALUES, NUMBER_OF_VALUES, VALUES_OF_MASK
+
+""" Incremental solving session for interactive clients
+
+The candidate state is kept as bitmasks (bit v set for value v) of the values
+used in each row, column and block, so an edit only updates three counters
+instead of recomputing feasible values for the whole sudoku.
+"""
+
+# # block number of every cell
+_BLOCK_OF_CELL = [
+    [next(block for block, cells in enumerate(BLOCKS) if row * 9 + column in cells)
+     for column in range(9)]
+    for row in range(9)]
+
+# # (row, column) of the cells of every block, row and column, in the order
+# # of find_feasible_values (block first, then row, then column)
+_UNITS = [(technique, [divmod(cell, 9) for cell in cells])
+          for technique, cells in UNITS]
+
+
+class SudokuSession(object):
+    """ Sudoku being solved interactively, one edit at a time
+
+    Cells given in the original sudoku cannot be changed. Other cells can be
+    filled (place), emptied (erase), and every edit can be undone (undo).
+    Conflicting values are accepted, so that a client can show the mistake;
+    is_still_solvable then returns False.
+
+    Argument:
+        sudoku_values (9x9 ndarray, required) -- given sudoku, values other than 1 - 9 are empty cells
+    """
+
+    def __init__(self, sudoku_values):
+        self._values = [[0] * 9 for _ in range(9)]
+        self._given = [[False] * 9 for _ in range(9)]
+        # # number of times each value is used in each row, column and block
+        self._row_counts = [[0] * 10 for _ in range(9)]
+        self._column_counts = [[0] * 10 for _ in range(9)]
+        self._block_counts = [[0] * 10 for _ in range(9)]
+        # # bitmasks of the values used in each row, column and block
+        self._row_used = [0] * 9
+        self._column_used = [0] * 9
+        self._block_used = [0] * 9
+        self._history = []
+        self._solvable = None
+
+        for row in range(9):
+            for column in range(9):
+                value = int(sudoku_values[row, column])
+                if 1 <= value <= 9:
+                    self._set(row, column, value)
+                    self._given[row][column] = True
+
+    def _set(self, row, column, value):
+        """ Fill an empty cell and update the candidate state
+        """
+        bit = 1 << value
+        block = _BLOCK_OF_CELL[row][column]
+        self._values[row][column] = value
+        self._row_counts[row][value] += 1
+        self._column_counts[column][value] += 1
+        self._block_counts[block][value] += 1
+        self._row_used[row] |= bit
+        self._column_used[column] |= bit
+        self._block_used[block] |= bit
+
+    def _clear(self, row, column):
+        """ Empty a filled cell and update the candidate state
+        """
+        value = self._values[row][column]
+        bit = 1 << value
+        block = _BLOCK_OF_CELL[row][column]
+        self._values[row][column] = 0
+        self._row_counts[row][value] -= 1
+        if self._row_counts[row][value] == 0:
+            self._row_used[row] &= ~bit
+        self._column_counts[column][value] -= 1
+        if self._column_counts[column][value] == 0:
+            self._column_used[column] &= ~bit
+        self._block_counts[block][value] -= 1
+        if self._block_counts[block][value] == 0:
+            self._block_used[block] &= ~bit
+
+    def _edit(self, row, column, value):
+        """ Change the value of a cell (0 to empty it), without recording history
+        """
+        if self._values[row][column] != 0:
+            self._clear(row, column)
+        if value != 0:
+            self._set(row, column, value)
+        self._solvable = None
+
+    def _check_editable(self, row, column):
+        if not (0 <= row < 9 and 0 <= column < 9):
+            raise ValueError(
+                "Cell ({}, {}) is outside of the sudoku".format(row, column))
+        if self._given[row][column]:
+            raise ValueError(
+                "Cell ({}, {}) is given and cannot be changed".format(row, column))
+
+    def _candidate_mask(self, row, column):
+        return ALL_VALUES & ~(
+            self._row_used[row] | self._column_used[column] |
+            self._block_used[_BLOCK_OF_CELL[row][column]])
+
+    @property
+    def sudoku_values(self):
+        """ Current sudoku (9x9 ndarray), 0 for empty cells
+        """
+        return np.array(self._values, dtype="i4")
+
+    def place(self, row, column, value):
+        """ Fill a cell with a value, replacing the previous value if any
+
+        Argument:
+            row (int, required) -- row number
+            column (int, required) -- column number
+            value (int, required) -- value 1 - 9
+        """
+        self._check_editable(row, column)
+        if not 1 <= value <= 9:
+            raise ValueError("Value {} is not 1 - 9".format(value))
+        self._history.append((row, column, self._values[row][column]))
+        self._edit(row, column, value)
+
+    def erase(self, row, column):
+        """ Empty a cell
+
+        Argument:
+            row (int, required) -- row number
+            column (int, required) -- column number
+        """
+        self._check_editable(row, column)
+        if self._values[row][column] != 0:
+            self._history.append((row, column, self._values[row][column]))
+            self._edit(row, column, 0)
+
+    def undo(self):
+        """ Undo the last place or erase
+
+        Return:
+            tuple (row, column) of the restored cell, None if there is nothing to undo
+        """
+        if not self._history:
+            return None
+        row, column, value = self._history.pop()
+        self._edit(row, column, value)
+        return row, column
+
+    def candidates(self, row, column):
+        """ Values not yet used on the same row, same column, or same block
+
+        Return:
+            list of values, empty if the cell is filled
+        """
+        if self._values[row][column] != 0:
+            return []
+        return VALUES_OF_MASK[self._candidate_mask(row, column)]
+
+    def hint(self):
+        """ Next cell that can be deduced logically
+
+        Naked singles (a cell with one candidate) come first, then hidden
+        singles (a value with one possible cell) in a block, a row, or a
+        column, as in find_feasible_values.
+
+        Return:
+            tuple (row, column, value, technique), None if no cell can be deduced
+        """
+        for row in range(9):
+            for column in range(9):
+                if self._values[row][column] == 0:
+                    mask = self._candidate_mask(row, column)
+                    if NUMBER_OF_VALUES[mask] == 1:
+                        return (row, column, VALUES_OF_MASK[mask][0],
+                                TECHNIQUE_NAKED_SINGLE)
+
+        for technique, cells in _UNITS:
+            # # values that are candidates of exactly one cell of the unit
+            seen_once = 0
+            seen_twice = 0
+            for row, column in cells:
+                if self._values[row][column] == 0:
+                    mask = self._candidate_mask(row, column)
+                    seen_twice |= seen_once & mask
+                    seen_once |= mask
+            hidden_singles = seen_once & ~seen_twice
+            if hidden_singles:
+                value = VALUES_OF_MASK[hidden_singles][0]
+                bit = 1 << value
+                for row, column in cells:
+                    if (self._values[row][column] == 0 and
+                            self._candidate_mask(row, column) & bit):
+                        return row, column, value, technique
+        return None
+
+    def is_still_solvable(self):
+        """ Whether the current sudoku can still be completed
+
+        The answer is cached until the next edit.
+
+        Return:
+            True if the sudoku has at least one solution, False otherwise
+        """
+        if self._solvable is None:
+            self._solvable = self._search_solution()
+        return self._solvable
+
+    def _search_solution(self):
+        """ Depth first search on the candidate state, most constrained cell first
+        """
+        # # a value used twice in a row, column or block is a conflict
+        for counts in (self._row_counts, self._column_counts, self._block_counts):
+            for unit_counts in counts:
+                if max(unit_counts) > 1:
+                    return False
+
+        values = [list(row_values) for row_values in self._values]
+        row_used = list(self._row_used)
+        column_used = list(self._column_used)
+        block_used = list(self._block_used)
+
+        def search():
+            best_count = 10
+            for row in range(9):
+                for column in range(9):
+                    if values[row][column] == 0:
+                        mask = ALL_VALUES & ~(
+                            row_used[row] | column_used[column] |
+                            block_used[_BLOCK_OF_CELL[row][column]])
+                        count = NUMBER_OF_VALUES[mask]
+                        if count == 0:
+                            return False
+                        if count < best_count:
+                            best_count = count
+                            best_row, best_column, best_mask = row, column, mask
+            if best_count == 10:
+                return True
+
+            block = _BLOCK_OF_CELL[best_row][best_column]
+            for value in VALUES_OF_MASK[best_mask]:
+                bit = 1 << value
+                values[best_row][best_column] = value
+                row_used[best_row] |= bit
+                column_used[best_column] |= bit
+                block_used[block] |= bit
+                found = search()
+                values[best_row][best_column] = 0
+                row_used[best_row] &= ~bit
+                column_used[best_column] &= ~bit
+                block_used[block] &= ~bit
+                if found:
+                    return True
+            return False
+
+        return search()
@@ -0,0 +1,223 @@
+import numpy as np
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+
+from units import CLASSIC_UNITS
+
+""" Persistent store of solved sudoku puzzles
+
+The solutions are kept in an SQLite database, so they survive the process
+and are shared by every process using the same file. A puzzle is keyed by
+its 81 values packed two per byte (41 bytes), followed for a variant by a
+digest of its units. The database is in write-ahead logging mode: readers do
+not block each other nor the writer. When the store holds more than
+max_entries solutions, the least recently used ones are evicted. Opening an
+existing store and looking a puzzle up never write: the last use of the
+solution found is only refreshed if no other connection is writing, so
+that readers never wait for a writer nor fail because of one.
+"""
+
+# # fraction of max_entries evicted at once, so that eviction is not run on every insert
+_EVICTION_FRACTION = 0.1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    puzzle_key BLOB PRIMARY KEY,
+    solution BLOB NOT NULL,
+    last_used REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used);
+CREATE TABLE IF NOT EXISTS store_size (size INTEGER NOT NULL);
+INSERT INTO store_size SELECT 0 WHERE NOT EXISTS (SELECT * FROM store_size);
+CREATE TRIGGER IF NOT EXISTS solutions_insert AFTER INSERT ON solutions
+    BEGIN UPDATE store_size SET size = size + 1; END;
+CREATE TRIGGER IF NOT EXISTS solutions_delete AFTER DELETE ON solutions
+    BEGIN UPDATE store_size SET size = size - 1; END;
+"""
+
+
+def _pack_values(sudoku_values):
+    """ Pack the 81 values of a sudoku two per byte, 0 for empty cells
+    """
+    flag_empty_cells = (sudoku_values <= 0) | (sudoku_values >= 10)
+    values = np.zeros(82, dtype="u1")
+    values[:81] = np.where(flag_empty_cells, 0, sudoku_values).ravel()
+    return (values[0::2] << 4 | values[1::2]).tostring()
+
+
+def _unpack_values(packed_values):
+    """ Unpack the values packed by _pack_values into a 9x9 ndarray
+    """
+    packed_values = np.frombuffer(bytes(packed_values), dtype="u1")
+    values = np.empty(82, dtype="i4")
+    values[0::2] = packed_values >> 4
+    values[1::2] = packed_values & 15
+    return values[:81].reshape((9, 9))
+
+
+def puzzle_key(sudoku_values, units=CLASSIC_UNITS):
+    """ Compact key of a sudoku
+
+    Argument:
+        sudoku_values (9x9 ndarray, required) -- given sudoku
+        units (SudokuUnits, optional) -- units of the sudoku, classic sudoku by default
+
+    Return:
+        str of 41 bytes for a classic sudoku, 49 bytes for a variant
+    """
+    key = _pack_values(sudoku_values)
+    if units is not CLASSIC_UNITS:
+        key += hashlib.sha1(repr(units.units)).digest()[:8]
+    return key
+
+
+class SolutionStore(object):
+    """ Persistent map from sudoku puzzles to their solutions
+
+    Argument:
+        filename (str, required) -- SQLite database filename, created if needed
+        max_entries (int, optional) -- maximum number of solutions kept, 100000 by default
+        timeout (float, optional) -- seconds to wait for another process writing the store
+
+    Pass it to solve_sudoku as store= to look puzzles up before solving them
+    and to keep the new solutions. A store can be used from several
+    processes, each process opens its own connection.
+    """
+
+    def __init__(self, filename, max_entries=100000, timeout=30.0):
+        self.filename = filename
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._connection = None
+        self._pid = None
+        self._connect()
+
+    def _connect(self):
+        """ Connection of the current process, opened again after a fork
+        """
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(
+                self.filename, timeout=self.timeout, isolation_level=None)
+            # # so that INSERT OR REPLACE fires the delete trigger of the replaced row
+            self._connection.execute("PRAGMA recursive_triggers=ON")
+            if not self._has_schema():
+                self._create_schema()
+            self._pid = os.getpid()
+        return self._connection
+
+    def _create_schema(self):
+        """ Create the tables of a new store, so that opening an existing one never writes
+        """
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        try:
+            self._connection.executescript("BEGIN IMMEDIATE;" + _SCHEMA + "COMMIT;")
+        except sqlite3.OperationalError:
+            try:
+                self._connection.execute("ROLLBACK")
+            except sqlite3.OperationalError:
+                pass
+            # # another process opening the new store may have created it first
+            if not self._has_schema():
+                raise
+
+    def _has_schema(self):
+        """ Whether the tables of the store exist
+        """
+        return self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'store_size'").fetchone() is not None
+
+    def get(self, sudoku_values, units=CLASSIC_UNITS):
+        """ Solution of a sudoku, if it is in the store
+
+        Argument:
+            sudoku_values (9x9 ndarray, required) -- given sudoku
+            units (SudokuUnits, optional) -- units of the sudoku, classic sudoku by default
+
+        Return:
+            sudoku_values (9x9 ndarray) of the solution, None if the sudoku is not in the store
+        """
+        connection = self._connect()
+        key = sqlite3.Binary(puzzle_key(sudoku_values, units))
+        row = connection.execute(
+            "SELECT solution FROM solutions WHERE puzzle_key = ?",
+            (key,)).fetchone()
+        if row is None:
+            return None
+        # # best effort: the last use is not refreshed while another connection writes
+        connection.execute("PRAGMA busy_timeout = 0")
+        try:
+            connection.execute(
+                "UPDATE solutions SET last_used = ? WHERE puzzle_key = ?",
+                (time.time(), key))
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            connection.execute(
+                "PRAGMA busy_timeout = {:d}".format(int(self.timeout * 1000)))
+        return _unpack_values(row[0])
+
+    def put(self, sudoku_values, sudoku_solution, units=CLASSIC_UNITS):
+        """ Keep the solution of a sudoku, evicting the least recently used if the store is full
+
+        Argument:
+            sudoku_values (9x9 ndarray, required) -- given sudoku
+            sudoku_solution (9x9 ndarray, required) -- its solution
+            units (SudokuUnits, optional) -- units of the sudoku, classic sudoku by default
+        """
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)",
+                (sqlite3.Binary(puzzle_key(sudoku_values, units)),
+                 sqlite3.Binary(_pack_values(sudoku_solution)), time.time()))
+            size = connection.execute("SELECT size FROM store_size").fetchone()[0]
+            if size > self.max_entries:
+                number_evicted = size - self.max_entries + \
+                    int(self.max_entries * _EVICTION_FRACTION)
+                connection.execute(
+                    "DELETE FROM solutions WHERE puzzle_key IN ("
+                    "SELECT puzzle_key FROM solutions ORDER BY last_used LIMIT ?)",
+                    (number_evicted,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def __len__(self):
+        return self._connect().execute(
+            "SELECT size FROM store_size").fetchone()[0]
+
+    def clear(self):
+        """ Remove every solution from the store
+        """
+        self._connect().execute("DELETE FROM solutions")
+
+    def close(self):
+        """ Close the connection of the current process
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Inspect the store of solved sudoku puzzles")
+    parser.add_argument("store_filename", help="Solution store filename")
+    parser.add_argument(
+        "--clear", action="store_true", help="Remove every solution")
+    args = parser.parse_args()
+
+    with SolutionStore(args.store_filename) as store:
+        if args.clear:
+            store.clear()
+        print "{} solutions in {}".format(len(store), args.store_filename)
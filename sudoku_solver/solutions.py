@@ -0,0 +1,182 @@
+import numpy as np
+import argparse
+import json
+import os
+
+from bitmasks import (
+    NUMBER_OF_VALUES, VALUES_OF_MASK, Contradiction, assign, initial_state,
+    propagate_singles)
+
+""" Lazy, resumable enumeration of all the solutions of a sudoku
+
+The search fills naked and hidden singles, then branches on the empty cell
+with the fewest candidates (the first one in case of a tie), trying its
+candidates in increasing order. The order is deterministic, so the branch
+path of a solution, a list of [cell, value] pairs with cells numbered 0 - 80
+(row * 9 + column), is a cursor from which the enumeration can be resumed,
+in the same or in another process.
+"""
+
+
+def _branch_cell(values, candidates):
+    """ Empty cell with the fewest candidates, None if the sudoku is filled
+    """
+    best_cell = None
+    best_count = 10
+    for cell in range(81):
+        if values[cell] == 0 and NUMBER_OF_VALUES[candidates[cell]] < best_count:
+            best_cell = cell
+            best_count = NUMBER_OF_VALUES[candidates[cell]]
+    return best_cell
+
+
+def _enter_branch(values, candidates, cell, value):
+    """ Fill a cell on a copy of the state and propagate singles
+
+    Return:
+        tuple (values, candidates) of the new state, None if it is a dead end
+    """
+    values = list(values)
+    candidates = list(candidates)
+    try:
+        assign(values, candidates, cell, value)
+        propagate_singles(values, candidates)
+    except Contradiction:
+        return None
+    return values, candidates
+
+
+def iter_solutions(sudoku_values, cursor=None):
+    """ Generate all the solutions of a sudoku, one at a time
+
+    Memory use does not grow with the number of solutions: only the states
+    along the current branch path (at most 81) are kept.
+
+    Argument:
+        sudoku_values (9x9 ndarray, required) -- given sudoku, values other than 1 - 9 are empty cells
+        cursor (list of [cell, value], optional) -- cursor of a solution
+        generated before, the enumeration resumes right after that solution
+
+    Return:
+        generator of tuples (sudoku_values, cursor), where sudoku_values
+        (9x9 ndarray) is a solution and cursor (list of [cell, value],
+        JSON serializable) is its branch path
+    """
+    try:
+        values, candidates = initial_state(sudoku_values)
+        propagate_singles(values, candidates)
+    except Contradiction:
+        return
+    node = (values, candidates)
+
+    # # one frame per branch on the current path:
+    # # [values, candidates, cell, branch values, index of the next branch value]
+    stack = []
+
+    if cursor is not None:
+        for cell, value in cursor:
+            values, candidates = node
+            branch_values = VALUES_OF_MASK[candidates[cell]]
+            if _branch_cell(values, candidates) != cell or value not in branch_values:
+                raise ValueError("Cursor does not match the sudoku")
+            stack.append([values, candidates, cell, branch_values,
+                          branch_values.index(value) + 1])
+            node = _enter_branch(values, candidates, cell, value)
+            if node is None:
+                raise ValueError("Cursor does not match the sudoku")
+        if _branch_cell(*node) is not None:
+            raise ValueError("Cursor does not point to a solution")
+        # # the solution of the cursor has been generated already
+        node = None
+
+    while True:
+        if node is not None:
+            values, candidates = node
+            cell = _branch_cell(values, candidates)
+            if cell is None:
+                yield (np.array(values, dtype="i4").reshape((9, 9)),
+                       [[frame[2], frame[3][frame[4] - 1]] for frame in stack])
+            else:
+                stack.append([values, candidates, cell,
+                              VALUES_OF_MASK[candidates[cell]], 0])
+            node = None
+
+        # # move on to the next branch, backtracking when a cell is exhausted
+        while node is None:
+            if not stack:
+                return
+            frame = stack[-1]
+            values, candidates, cell, branch_values, index = frame
+            if index == len(branch_values):
+                stack.pop()
+                continue
+            frame[4] += 1
+            node = _enter_branch(values, candidates, cell, branch_values[index])
+
+
+def _write_checkpoint(checkpoint_filename, cursor, number_of_solutions):
+    """ Write the cursor atomically, so that a preempted job leaves a valid checkpoint
+    """
+    temporary_filename = checkpoint_filename + ".tmp"
+    with open(temporary_filename, "w") as checkpoint_file:
+        json.dump({"cursor": cursor,
+                   "number_of_solutions": number_of_solutions}, checkpoint_file)
+    os.rename(temporary_filename, checkpoint_filename)
+
+
+def _truncate_lines(filename, number_of_lines):
+    """ Keep the first lines of a file, e.g. the solutions written before the last checkpoint
+    """
+    with open(filename, "r+") as lines_file:
+        for _ in range(number_of_lines):
+            lines_file.readline()
+        lines_file.truncate(lines_file.tell())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Enumerate all the solutions of a sudoku")
+    parser.add_argument(
+        "-i", "--in-file", dest="in_filename",
+        help="Sudoku input filename", required=True)
+    parser.add_argument(
+        "-o", "--out-file", dest="out_filename", required=True,
+        help="Solutions output filename, one solution of 81 digits per line")
+    parser.add_argument(
+        "--checkpoint", dest="checkpoint_filename",
+        help="Checkpoint filename, the enumeration resumes from it if it exists")
+    parser.add_argument(
+        "-n", "--max-solutions", dest="max_solutions", type=int,
+        help="Stop after this many solutions in total")
+    args = parser.parse_args()
+
+    sudoku_values = np.loadtxt(args.in_filename, delimiter=",", dtype="i4")
+    cursor = None
+    number_of_solutions = 0
+    flag_resume = args.checkpoint_filename is not None and \
+        os.path.exists(args.checkpoint_filename) and \
+        os.path.exists(args.out_filename)
+    if flag_resume:
+        with open(args.checkpoint_filename) as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        cursor = checkpoint["cursor"]
+        number_of_solutions = checkpoint["number_of_solutions"]
+        # # a solution written after the last checkpoint is enumerated again
+        _truncate_lines(args.out_filename, number_of_solutions)
+
+    # # the output file is only appended to when the enumeration resumes
+    with open(args.out_filename, "a" if flag_resume else "w") as out_file:
+        for sudoku_solution, cursor in iter_solutions(sudoku_values, cursor):
+            if args.max_solutions is not None and \
+                    number_of_solutions >= args.max_solutions:
+                break
+            out_file.write("".join(map(str, sudoku_solution.ravel())) + "\n")
+            number_of_solutions += 1
+            if args.checkpoint_filename is not None:
+                # # the solution must be on disk before the checkpoint moves past it
+                out_file.flush()
+                os.fsync(out_file.fileno())
+                _write_checkpoint(
+                    args.checkpoint_filename, cursor, number_of_solutions)
+    print "{} solutions written to {}".format(
+        number_of_solutions, args.out_filename)
@@ -0,0 +1,254 @@
+import numpy as np
+import collections
+import itertools
+import multiprocessing
+import multiprocessing.sharedctypes
+import threading
+import timeit
+try:
+    from Queue import Empty
+except ImportError:
+    from queue import Empty
+
+from sudoku import solve_sudoku
+
+""" Pool of warm solver processes exchanging sudoku puzzles through shared memory
+
+The puzzles and solutions are stored in a ring of 9x9 slots in a shared array
+that is created before the worker processes are started. Only the slot
+number goes through the task and result queues, so no ndarray is pickled.
+Each worker publishes the task it is solving in another shared array, so
+that when a worker dies (e.g. killed for lack of memory), its sudoku fails
+instead of waiting forever, and the worker is replaced.
+"""
+
+# # seconds between two checks that the workers are alive
+_POLL_INTERVAL = 0.1
+
+
+class SolverFuture(object):
+    """ Result of a sudoku submitted to a SolverPool
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._solution = None
+        self._error = None
+
+    def _set(self, solution, error):
+        self._solution = solution
+        self._error = error
+        self._event.set()
+
+    def done(self):
+        """ Whether the sudoku has been solved (or failed)
+        """
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        """ Wait for the solution
+
+        Argument:
+            timeout (float, optional) -- seconds to wait, no limit by default
+
+        Return:
+            sudoku_values (9x9 ndarray) returned by the solver, None if the
+            solver returns None
+        """
+        if not self._event.wait(timeout):
+            raise multiprocessing.TimeoutError()
+        if self._error is not None:
+            raise RuntimeError(self._error)
+        return self._solution
+
+
+def _worker(solver, shared_values, worker_tasks, worker_number, task_queue,
+            result_queue):
+    """ Solve the sudoku in each slot received, until None is received
+    """
+    sudoku_slots = np.ctypeslib.as_array(shared_values).reshape((-1, 9, 9))
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        task_id, slot = task
+        worker_tasks[worker_number] = task_id
+        try:
+            sudoku_solution = solver(sudoku_slots[slot].copy())
+            if sudoku_solution is not None:
+                sudoku_slots[slot] = sudoku_solution
+        except Exception as error:
+            result_queue.put((task_id, False, repr(error)))
+        else:
+            result_queue.put((task_id, sudoku_solution is not None, None))
+        worker_tasks[worker_number] = -1
+
+
+class SolverPool(object):
+    """ Persistent pool of sudoku solver processes
+
+    Argument:
+        processes (int, optional) -- number of worker processes, default is the number of CPUs
+        slots (int, optional) -- number of sudoku puzzles in flight at a time, default is 4 per process
+        solver (callable, optional) -- solver function run by the workers, default is solve_sudoku
+
+    A sudoku whose worker dies fails with a RuntimeError, and the worker is
+    replaced by a new one.
+
+    Use it as a context manager, or call close() when done:
+
+        with SolverPool() as pool:
+            sudoku_solutions = pool.map(sudoku_values_list)
+    """
+
+    def __init__(self, processes=None, slots=None, solver=solve_sudoku):
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        if slots is None:
+            slots = 4 * processes
+
+        self._shared_values = multiprocessing.sharedctypes.RawArray(
+            "i", slots * 81)
+        self._sudoku_slots = np.ctypeslib.as_array(
+            self._shared_values).reshape((slots, 9, 9))
+        self._free_slots = collections.deque(range(slots))
+        self._slot_available = threading.Semaphore(slots)
+        self._slot_lock = threading.Lock()
+        # # task id -> (slot, future) of the sudoku submitted and not solved yet
+        self._tasks = {}
+        self._task_ids = itertools.count()
+        self._closed = False
+
+        self._solver = solver
+        self._task_queue = multiprocessing.Queue()
+        self._result_queue = multiprocessing.Queue()
+        # # task id solved by each worker, -1 when it waits for a task
+        self._worker_tasks = multiprocessing.sharedctypes.RawArray(
+            "l", [-1] * processes)
+        self._workers = [self._start_worker(worker_number)
+                         for worker_number in range(processes)]
+
+        self._collector = threading.Thread(target=self._collect_results)
+        self._collector.daemon = True
+        self._collector.start()
+
+    def _start_worker(self, worker_number):
+        """ Start the worker process of the given number
+        """
+        self._worker_tasks[worker_number] = -1
+        worker = multiprocessing.Process(
+            target=_worker,
+            args=(self._solver, self._shared_values, self._worker_tasks,
+                  worker_number, self._task_queue, self._result_queue))
+        worker.daemon = True
+        worker.start()
+        return worker
+
+    def _resolve(self, task_id, solved, error):
+        """ Set the future of a task and free its slot, unless the task is already resolved
+        """
+        with self._slot_lock:
+            if task_id not in self._tasks:
+                return
+            slot, future = self._tasks.pop(task_id)
+            if solved:
+                sudoku_solution = self._sudoku_slots[slot].copy()
+            else:
+                sudoku_solution = None
+            self._free_slots.append(slot)
+        self._slot_available.release()
+        future._set(sudoku_solution, error)
+
+    def _replace_dead_workers(self):
+        """ Fail the task of every dead worker and start a new worker in its place
+
+        Return:
+            True once the pool is closed and every worker has exited, False otherwise
+        """
+        flag_workers_exited = True
+        for worker_number, worker in enumerate(self._workers):
+            if worker.is_alive():
+                flag_workers_exited = False
+                continue
+            task_id = self._worker_tasks[worker_number]
+            if task_id != -1:
+                self._resolve(task_id, False, "Solver process exited with code {}".format(
+                    worker.exitcode))
+            # # a worker only exits on its own once the pool is closed
+            if not self._closed or worker.exitcode != 0 or task_id != -1:
+                self._workers[worker_number] = self._start_worker(worker_number)
+                if self._closed:
+                    # # the dead worker may have taken its None already
+                    self._task_queue.put(None)
+                flag_workers_exited = False
+        return self._closed and flag_workers_exited
+
+    def _collect_results(self):
+        """ Resolve the futures as the workers report results, until the pool is closed
+        """
+        last_check = timeit.default_timer()
+        flag_stopping = False
+        while True:
+            try:
+                result = self._result_queue.get(timeout=_POLL_INTERVAL)
+            except Empty:
+                if flag_stopping:
+                    break
+                result = None
+            if result is not None:
+                self._resolve(*result)
+            if result is None or timeit.default_timer() - last_check > _POLL_INTERVAL:
+                # # once every worker has exited, the results still queued are read
+                flag_stopping = self._replace_dead_workers()
+                last_check = timeit.default_timer()
+
+    def submit(self, sudoku_values):
+        """ Submit a sudoku to be solved, waiting for a free slot if needed
+
+        Argument:
+            sudoku_values (9x9 ndarray, required) -- given sudoku, to be solved
+
+        Return:
+            SolverFuture of the solution
+        """
+        if self._closed:
+            raise ValueError("SolverPool is closed")
+        self._slot_available.acquire()
+        future = SolverFuture()
+        with self._slot_lock:
+            slot = self._free_slots.popleft()
+            task_id = next(self._task_ids)
+            self._sudoku_slots[slot] = sudoku_values
+            self._tasks[task_id] = (slot, future)
+        self._task_queue.put((task_id, slot))
+        return future
+
+    def map(self, sudoku_values_list):
+        """ Solve many sudoku puzzles, blocking until all are solved
+
+        Argument:
+            sudoku_values_list (iterable of 9x9 ndarray, required) -- given sudoku puzzles
+
+        Return:
+            list of solutions, in the input order
+        """
+        futures = [self.submit(sudoku_values) for sudoku_values in sudoku_values_list]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """ Stop the workers once the submitted sudoku puzzles are solved
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._workers:
+            self._task_queue.put(None)
+        self._collector.join()
+        for worker in self._workers:
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,6 +1,50 @@
 import numpy as np
 import argparse
 import sys
+import timeit
+
+from units import (
+    CLASSIC_UNITS, UNIT_BLOCK, UNIT_ROW, UNIT_COLUMN, UNIT_REGION,
+    UNIT_DIAGONAL, UNIT_WINDOW, load_sudoku)
+
+
+# # techniques reported to event sinks when a cell is assigned
+TECHNIQUE_NAKED_SINGLE = "naked_single"
+TECHNIQUE_HIDDEN_SINGLE_BLOCK = "hidden_single_block"
+TECHNIQUE_HIDDEN_SINGLE_ROW = "hidden_single_row"
+TECHNIQUE_HIDDEN_SINGLE_COLUMN = "hidden_single_column"
+TECHNIQUE_HIDDEN_SINGLE_REGION = "hidden_single_region"
+TECHNIQUE_HIDDEN_SINGLE_DIAGONAL = "hidden_single_diagonal"
+TECHNIQUE_HIDDEN_SINGLE_WINDOW = "hidden_single_window"
+TECHNIQUE_SEARCH = "search"
+
+# # technique of a hidden single found in each kind of unit
+_HIDDEN_SINGLE_TECHNIQUES = {
+    UNIT_BLOCK: TECHNIQUE_HIDDEN_SINGLE_BLOCK,
+    UNIT_ROW: TECHNIQUE_HIDDEN_SINGLE_ROW,
+    UNIT_COLUMN: TECHNIQUE_HIDDEN_SINGLE_COLUMN,
+    UNIT_REGION: TECHNIQUE_HIDDEN_SINGLE_REGION,
+    UNIT_DIAGONAL: TECHNIQUE_HIDDEN_SINGLE_DIAGONAL,
+    UNIT_WINDOW: TECHNIQUE_HIDDEN_SINGLE_WINDOW}
+
+# # events reported to event sinks
+# # an event sink is any callable event_sink(event, row, column, value, technique)
+EVENT_CELL_ASSIGNED = "cell_assigned"
+EVENT_BRANCH_ENTERED = "branch_entered"
+EVENT_BACKTRACK = "backtrack"
+EVENT_SOLUTION_FOUND = "solution_found"
+
+# # propagation run at every node of the combinatorial search
+# # none: branch right away
+# # naked_singles: fill the cells with one value not appearing in their units, until there is none
+# # full: solve_sudoku_greedy, naked and hidden singles until there is none
+# # adaptive: naked singles, and hidden singles only while they pay off (see AdaptivePropagation)
+PROPAGATION_NONE = "none"
+PROPAGATION_NAKED_SINGLES = "naked_singles"
+PROPAGATION_FULL = "full"
+PROPAGATION_ADAPTIVE = "adaptive"
+PROPAGATION_LEVELS = (PROPAGATION_NONE, PROPAGATION_NAKED_SINGLES,
+                      PROPAGATION_FULL, PROPAGATION_ADAPTIVE)
 
 
 def get_indices_from_same_block(index):
@@ -22,46 +66,35 @@ def get_indices_from_same_block(index):
         return np.array([6, 7, 8])
 
 
-def validate_sudoku(sudoku_values):
+def validate_sudoku(sudoku_values, units=CLASSIC_UNITS):
     """ Validate a given sudoku solution
     
     Argument:
         sudoku_values (9x9 ndarray, required) -- sudoku solution
+        units (SudokuUnits, optional) -- units of the sudoku, classic sudoku by default
         
     Return:
         True if the solution is valid:
             - place only numbers 1 to 9 in the empty cells
-            - each row, each column and each 3x3 block contains 
-            the same number only once
+            - each unit (for a classic sudoku, each row, each column and 
+            each 3x3 block) contains the same number only once
         False otherwise
     """
     # # should only have numbers 1 to 9
     if np.min(sudoku_values) <= 0 or np.max(sudoku_values) >= 10:
         return False
 
-    # # test row uniqueness
-    for row in range(9):
-        if len(np.unique(sudoku_values[row, :])) != 9:
-            return False
-
-    # # test column uniqueness
-    for column in range(9):
-        if len(np.unique(sudoku_values[:, column])) != 9:
+    # # test uniqueness in every unit
+    for _, cells in units.units:
+        if len(np.unique(sudoku_values.take(cells))) != 9:
             return False
 
-    # # test block uniqueness
-    for first_row in range(0, 9, 3):
-        for first_column in range(0, 9, 3):
-            row_range = get_indices_from_same_block(first_row)
-            column_range = get_indices_from_same_block(first_column)
-            if len(np.unique(sudoku_values[row_range][:, column_range])) != 9:
-                return False
-
     # # otherwise
     return True
 
 
-def exclude_values_appeared_in_same_row_column_block(sudoku_values, row, column):
+def exclude_values_appeared_in_same_row_column_block(
+        sudoku_values, row, column, units=CLASSIC_UNITS):
     """ Return feasible values at the given row and column of a sudoku
     by excluding numbers that appear on the same row, same column, or same block
     
@@ -69,62 +102,31 @@ def exclude_values_appeared_in_same_row_column_block(sudoku_values, row, column)
         sudoku_values (9x9 ndarray, required) -- given sudoku, can be partially or fully filled
         row (int, required) -- row number
         column (int, required) -- column number
+        units (SudokuUnits, optional) -- units of the sudoku, classic sudoku by default
     
     Returns:
         ndarray that contains the feasible values at the given row and column 
         of the sudoku
     
     Algorithm:
-        - Any number that appears on the same row, same column, or same block is NOT feasible and excluded. The rest is feasible.
+        - Any number that appears on the same row, same column, or same block (or, for a variant, any other unit of the cell) is NOT feasible and excluded. The rest is feasible.
         - Only values outside of the given cell will be used to calculate feasible values. Or, the value of the given cell will not be used.
     """
     # # set current cell value to 0 (not to use it)
     # # this could otherwise cause problems with filled sudoku
     sudoku_values[row, column] = 0
 
-    # # collect values in the given row
-    row_values = sudoku_values[row, :]
-
-    # # collect values in the given column
-    column_values = sudoku_values[:, column]
-
-    # # collect values in the given block
-    row_block_range = get_indices_from_same_block(row)
-    column_block_range = get_indices_from_same_block(column)
-    block_values = sudoku_values[row_block_range][:, column_block_range]
+    # # collect values of the cells sharing a unit with the given cell
+    appeared_values = sudoku_values.take(units.peers[row * 9 + column])
 
     # # subtract (setdiff) appeared values from numbers 1 - 9
-    appeared_values = np.append(np.append(row_values, column_values), block_values)
     possible_sudoku_values = np.arange(1, 10)
     feasible_values = np.setdiff1d(possible_sudoku_values, appeared_values)
     return feasible_values
 
 
-def _reformat_specified_rows_columns_into_tuple(rows, columns):
-    """ Reorganize specified rows and columns into a tuple for looping
-    
-    This is supposed to be a private function called by find_feasible_values only.
-    
-    Argument: 
-        rows (ndarray, required) -- single or multiple rows specified
-        columns (ndarray, required) -- single or multiple columns specified
-        
-    Return:
-        list of tuples that contains all the combinations of rows and columns.
-        
-    For example, rows = array([1,2]), columns = array([3,4]), the function 
-    will return [(1,3),(1,4),(2,3),(2,4)]
-    
-    """
-    mesh = np.meshgrid(rows, columns)
-    rows_columns_tuple = zip(
-        mesh[0].reshape((1, -1))[0],
-        mesh[1].reshape((1, -1))[0])
-    return rows_columns_tuple
-
-
 def _find_values_infeasible_for_specified_rows_columns(
-        sudoku_values, row, column, feasible_values, rows_columns_tuple):
+        sudoku_values, row, column, feasible_values, rows_columns_tuple, units):
     """ Find one number (among the remaining feasible values) is infeasible 
     for any other empty cell in the same block, same row, or same column
     
@@ -135,7 +137,8 @@ def _find_values_infeasible_for_specified_rows_columns(
         row (int, required) -- row number
         column (int, required) -- column number
         feasible_values (ndarray, required) -- returned from exclude_values_appeared_in_same_row_column_block(        sudoku_values,row,column)
-        rows_columns_tuple (list of tuple, required) -- returned from _reformat_specified_rows_columns_into_tuple
+        rows_columns_tuple (list of tuple, required) -- (row, column) of the cells of one unit
+        units (SudokuUnits, required) -- units of the sudoku
         
     Return:
         ndarray that contains the feasible values at the given row and column 
@@ -154,7 +157,8 @@ def _find_values_infeasible_for_specified_rows_columns(
                 and ((other_row != row) or (other_column != column))):
             # # get feasible values for other cells
             other_feasible_values = \
-                exclude_values_appeared_in_same_row_column_block(sudoku_values, other_row, other_column)
+                exclude_values_appeared_in_same_row_column_block(
+                    sudoku_values, other_row, other_column, units)
             # # subtract (setdiff) appeared values
             remaining_values = np.setdiff1d(
                 remaining_values,
@@ -168,13 +172,47 @@ def _find_values_infeasible_for_specified_rows_columns(
             return remaining_values
 
 
-def find_feasible_values(sudoku_values, row, column):
+def _find_feasible_values_and_technique(
+        sudoku_values, row, column, units=CLASSIC_UNITS):
+    """ Return feasible values at the given row and column of a sudoku, 
+    together with the technique that determined them
+    
+    This is supposed to be a private function called by find_feasible_values 
+    and solve_sudoku_greedy only.
+    
+    Return:
+        tuple (feasible_values, technique), where feasible_values is the same 
+        as find_feasible_values, and technique is one of the TECHNIQUE_* 
+        constants if feasible_values has exactly one element, None otherwise
+    """
+    feasible_values = exclude_values_appeared_in_same_row_column_block(
+        sudoku_values, row, column, units)
+    if len(feasible_values) == 1:
+        return feasible_values, TECHNIQUE_NAKED_SINGLE
+
+    # # try to find one feasible value that is infeasible for 
+    # # any other empty cell in the same unit, 
+    # # for a classic sudoku: same block, then same row, then same column
+    for unit_number in units.units_of_cell[row * 9 + column]:
+        remaining_values = _find_values_infeasible_for_specified_rows_columns(
+            sudoku_values, row, column, feasible_values,
+            units.unit_rows_columns[unit_number], units)
+        if remaining_values is not None:
+            kind = units.units[unit_number][0]
+            return remaining_values, _HIDDEN_SINGLE_TECHNIQUES[kind]
+
+    # # if none of the above works (i.e., returns anything)
+    return feasible_values, None
+
+
+def find_feasible_values(sudoku_values, row, column, units=CLASSIC_UNITS):
     """ Return feasible values at the given row and column of a sudoku
     
     Argument:
         sudoku_values (9x9 ndarray, required) -- given sudoku, can be partially or fully filled
         row (int, required) -- row number
         column (int, required) -- column number
+        units (SudokuUnits, optional) -- units of the sudoku, classic sudoku by default
     
     Returns:
         ndarray that contains the feasible values at the given row and column 
@@ -187,49 +225,15 @@ def find_feasible_values(sudoku_values, row, column):
         for any other empty cell in the same block, same row, or same column, 
         that number is uniquely the cell value and other feasible values for 
         the cell become infeasible
+        - For a variant, the other units of the cell (diagonals, windows, 
+        irregular regions) are used in the same way
     
     """
-    feasible_values = exclude_values_appeared_in_same_row_column_block(
-        sudoku_values, row, column)
-    if len(feasible_values) == 1:
-        return feasible_values
+    return _find_feasible_values_and_technique(
+        sudoku_values, row, column, units)[0]
 
-    # # try to find one feasible value that is infeasible for 
-    # # any other empty cell in the same block
-    rows_columns_tuple = _reformat_specified_rows_columns_into_tuple(
-        get_indices_from_same_block(row),
-        get_indices_from_same_block(column))
-    remaining_values = _find_values_infeasible_for_specified_rows_columns(
-        sudoku_values, row, column, feasible_values,
-        rows_columns_tuple)
-    if remaining_values is not None:
-        return remaining_values
-
-    # # try to find one feasible value that is infeasible for 
-    # # any other empty cell in the same row
-    rows_columns_tuple = _reformat_specified_rows_columns_into_tuple(
-        row, np.arange(9))
-    remaining_values = _find_values_infeasible_for_specified_rows_columns(
-        sudoku_values, row, column, feasible_values,
-        rows_columns_tuple)
-    if remaining_values is not None:
-        return remaining_values
 
-    # # try to find one feasible value that is infeasible for 
-    # # any other empty cell in the same column
-    rows_columns_tuple = _reformat_specified_rows_columns_into_tuple(
-        np.arange(9), column)
-    remaining_values = _find_values_infeasible_for_specified_rows_columns(
-        sudoku_values, row, column, feasible_values,
-        rows_columns_tuple)
-    if remaining_values is not None:
-        return remaining_values
-
-    # # if none of the above works (i.e., returns anything)
-    return feasible_values
-
-
-def solve_sudoku_greedy(sudoku_values):
+def solve_sudoku_greedy(sudoku_values, event_sink=None, units=CLASSIC_UNITS):
     """ Greedy sudoku solver
     
     Algorithm:
@@ -237,6 +241,8 @@ def solve_sudoku_greedy(sudoku_values):
     
     Argument: 
         sudoku_values (9x9 ndarray, required) -- given sudoku, to be solved
+        event_sink (callable, optional) -- called as event_sink(event, row, column, value, technique) for every cell filled
+        units (SudokuUnits, optional) -- units of the sudoku, classic sudoku by default
     
     Return:
         sudoku_values (9x9 ndarray), with empty cells (typically in the form
@@ -254,12 +260,16 @@ def solve_sudoku_greedy(sudoku_values):
         columns_empty_cells = positions_empty_cells[1]
         for row, column in zip(rows_empty_cells, columns_empty_cells):
             # # find feasible values for the empty cell
-            feasible_values = find_feasible_values(sudoku_values, row, column)
+            feasible_values, technique = _find_feasible_values_and_technique(
+                sudoku_values, row, column, units)
 
             # # if only one value is feasible, fill it, otherwise do nothing
             if len(feasible_values) == 1:
                 sudoku_values[row, column] = feasible_values[0]
                 number_of_cell_filled_this_round += 1
+                if event_sink is not None:
+                    event_sink(EVENT_CELL_ASSIGNED, row, column,
+                               feasible_values[0], technique)
 
         # # no cell is filled, stuck
         if number_of_cell_filled_this_round == 0:
@@ -272,20 +282,132 @@ def solve_sudoku_greedy(sudoku_values):
     return sudoku_values
 
 
-def solve_sudoku_combinatorial(sudoku_values):
+def _fill_naked_singles(sudoku_values, cells, event_sink=None,
+                        units=CLASSIC_UNITS):
+    """ Fill the cells with only one value not appearing in their units, until there is none
+
+    This is the cheap part of solve_sudoku_greedy: the hidden singles are not
+    searched for. Only the given cells are checked at first, then the empty
+    peers of every cell filled, since no other cell can become a naked single.
+
+    Argument:
+        cells (iterable of int, required) -- cells (row * 9 + column) to check first
+
+    Return:
+        False if an empty cell has no feasible value left (dead end), True otherwise
+    """
+    cells_to_check = list(cells)
+    while cells_to_check:
+        row, column = divmod(cells_to_check.pop(), 9)
+        if 0 < sudoku_values[row, column] < 10:
+            continue
+        feasible_values = exclude_values_appeared_in_same_row_column_block(
+            sudoku_values, row, column, units)
+        if len(feasible_values) == 0:
+            return False
+        if len(feasible_values) == 1:
+            sudoku_values[row, column] = feasible_values[0]
+            if event_sink is not None:
+                event_sink(EVENT_CELL_ASSIGNED, row, column,
+                           feasible_values[0], TECHNIQUE_NAKED_SINGLE)
+            cells_to_check.extend(units.peers[row * 9 + column])
+    return True
+
+
+class AdaptivePropagation(object):
+    """ Propagation level of the combinatorial search, chosen from its measured benefit
+
+    Naked singles are filled at every search node. The hidden singles of
+    solve_sudoku_greedy are searched for at the first warmup_nodes nodes and
+    then at every probe_interval-th node, to measure their benefit, and at
+    the other nodes only if they have paid off so far: a cell they fill saves
+    at least one search node, so they pay off while the cells they filled,
+    times the mean time of a search node without them, exceed the time spent
+    searching for them. A search node is a branch of the combinatorial
+    search, and its time is everything the search does for it but the hidden
+    singles and the nodes below it: the copy of the sudoku, the naked singles,
+    and the choice of the branch cell and of its feasible values for the
+    next branches.
+
+    Argument:
+        warmup_nodes (int, optional) -- number of nodes that always search for hidden singles
+        probe_interval (int, optional) -- hidden singles are searched for at least this often
+
+    Pass an instance as propagation= to read the measurements after solving,
+    or to keep them from one sudoku to the next.
+    """
+
+    def __init__(self, warmup_nodes=16, probe_interval=16):
+        self.warmup_nodes = warmup_nodes
+        self.probe_interval = probe_interval
+        self.number_of_nodes = 0
+        self.node_time = 0.0
+        self.number_of_hidden_single_runs = 0
+        self.hidden_single_time = 0.0
+        self.hidden_single_cells_filled = 0
+
+    def use_hidden_singles(self):
+        """ Whether to search for hidden singles at the node recorded last
+        """
+        if self.number_of_nodes <= self.warmup_nodes or \
+                self.number_of_nodes % self.probe_interval == 0:
+            return True
+        mean_node_time = self.node_time / self.number_of_nodes
+        return self.hidden_single_cells_filled * mean_node_time > \
+            self.hidden_single_time
+
+    def record_node(self, elapsed):
+        """ Record a search node and the time [s] of its copy and naked singles propagation
+        """
+        self.number_of_nodes += 1
+        self.node_time += elapsed
+
+    def record_node_time(self, elapsed):
+        """ Add time [s] to the search node recorded last, e.g. the choice of its branch cell
+        """
+        self.node_time += elapsed
+
+    def record_hidden_singles(self, elapsed, number_of_cells_filled):
+        """ Record the time [s] spent searching for hidden singles and the cells they filled
+        """
+        self.number_of_hidden_single_runs += 1
+        self.hidden_single_time += elapsed
+        self.hidden_single_cells_filled += number_of_cells_filled
+
+
+def _count_empty_cells(sudoku_values):
+    return int(((sudoku_values <= 0) | (sudoku_values >= 10)).sum())
+
+
+def solve_sudoku_combinatorial(sudoku_values, event_sink=None,
+                               units=CLASSIC_UNITS,
+                               propagation=PROPAGATION_FULL):
     """ Combinatorial (recursive) sudoku solver
     
     Algorithm:
         Combinatorially fill the empty cells with feasible values until solution is found.
         The algorithm is implemented recursively: fill the first empty cell with one of the feasible values and apply the algorithm to the resulting sudoku. If the number of feasible values is 0 for some cell, this would be a dead end. Current function call will finish and not return anything. If all the cells are filled successfully, solution is found. By convention, published sudoku should have one unique solution.
+        After a cell is filled, and before the algorithm is applied to the resulting sudoku, the propagation level decides which cells are filled right away (see PROPAGATION_LEVELS). By default, solve_sudoku_greedy is run (full propagation).
         
     Argument: 
         sudoku_values (9x9 ndarray, required) -- given sudoku, to be solved
+        event_sink (callable, optional) -- called as event_sink(event, row, column, value, technique) when a branch is entered, when it is abandoned (backtrack), and when the solution is found, as well as for every cell filled by the propagation
+        units (SudokuUnits, optional) -- units of the sudoku, classic sudoku by default
+        propagation (str or AdaptivePropagation, optional) -- one of PROPAGATION_LEVELS, PROPAGATION_FULL by default
     
     Return:
         sudoku_values (9x9 ndarray), with empty cells (typically in the form
         of 0, but could be any number other than 1 - 9) filled        
     """
+    if propagation == PROPAGATION_ADAPTIVE:
+        propagation = AdaptivePropagation()
+    elif propagation not in PROPAGATION_LEVELS and \
+            not isinstance(propagation, AdaptivePropagation):
+        raise ValueError("Unknown propagation level {}".format(propagation))
+    flag_adaptive = isinstance(propagation, AdaptivePropagation)
+    if flag_adaptive:
+        start = timeit.default_timer()
+
     # # find all the empty cells
     flag_empty_cells = (sudoku_values <= 0) | (sudoku_values >= 10)
     number_empty_cells = flag_empty_cells.sum()
@@ -297,28 +419,83 @@ def solve_sudoku_combinatorial(sudoku_values):
         row_first_empty_cell = positions_empty_cells[0][0]
         column_first_empty_cell = positions_empty_cells[1][0]
 
-        # # get all feasible values for the first empty cell
-        feasible_values_first_empty_cell = find_feasible_values(
-            sudoku_values, row_first_empty_cell, column_first_empty_cell)
+        # # get all feasible values for the first empty cell,
+        # # the hidden singles are left to the full propagation
+        if propagation == PROPAGATION_FULL:
+            feasible_values_first_empty_cell = find_feasible_values(
+                sudoku_values, row_first_empty_cell, column_first_empty_cell,
+                units)
+        else:
+            feasible_values_first_empty_cell = \
+                exclude_values_appeared_in_same_row_column_block(
+                    sudoku_values, row_first_empty_cell,
+                    column_first_empty_cell, units)
+        if flag_adaptive:
+            propagation.record_node_time(timeit.default_timer() - start)
 
         # # loop through each feasible value
         for value_first_empty_cell in feasible_values_first_empty_cell:
-            # # fill in the feasible value and solve recursively
+            if event_sink is not None:
+                event_sink(EVENT_BRANCH_ENTERED, row_first_empty_cell,
+                           column_first_empty_cell, value_first_empty_cell,
+                           TECHNIQUE_SEARCH)
+
+            # # fill in the feasible value, propagate and solve recursively
+            if flag_adaptive:
+                start = timeit.default_timer()
             new_sudoku_values = sudoku_values.copy()
             new_sudoku_values[row_first_empty_cell, column_first_empty_cell] = \
                 value_first_empty_cell
-            sudoku_solution = solve_sudoku(new_sudoku_values)
+            # # the naked singles propagation stops at a dead end
+            flag_dead_end = False
+            changed_cells = units.peers[
+                row_first_empty_cell * 9 + column_first_empty_cell]
+            if propagation == PROPAGATION_FULL:
+                new_sudoku_values = solve_sudoku_greedy(
+                    new_sudoku_values, event_sink=event_sink, units=units)
+            elif propagation == PROPAGATION_NAKED_SINGLES:
+                flag_dead_end = not _fill_naked_singles(
+                    new_sudoku_values, changed_cells, event_sink, units)
+            elif flag_adaptive:
+                flag_dead_end = not _fill_naked_singles(
+                    new_sudoku_values, changed_cells, event_sink, units)
+                propagation.record_node(timeit.default_timer() - start)
+                if not flag_dead_end and propagation.use_hidden_singles():
+                    start = timeit.default_timer()
+                    number_empty_cells_before = _count_empty_cells(
+                        new_sudoku_values)
+                    new_sudoku_values = solve_sudoku_greedy(
+                        new_sudoku_values, event_sink=event_sink, units=units)
+                    propagation.record_hidden_singles(
+                        timeit.default_timer() - start,
+                        number_empty_cells_before -
+                        _count_empty_cells(new_sudoku_values))
+            if flag_dead_end:
+                sudoku_solution = None
+            else:
+                sudoku_solution = solve_sudoku_combinatorial(
+                    new_sudoku_values, event_sink=event_sink, units=units,
+                    propagation=propagation)
 
             # # pass the solution up the recursion chain
             if sudoku_solution is not None:
                 return sudoku_solution
 
+            if event_sink is not None:
+                event_sink(EVENT_BACKTRACK, row_first_empty_cell,
+                           column_first_empty_cell, value_first_empty_cell,
+                           TECHNIQUE_SEARCH)
+
     # # sudoku filled successfully
-    elif validate_sudoku(sudoku_values):
+    elif validate_sudoku(sudoku_values, units):
+        if event_sink is not None:
+            event_sink(EVENT_SOLUTION_FOUND, None, None, None, None)
         return sudoku_values
 
 
-def solve_sudoku(sudoku_values, flag_greedy=True, flag_combinatorial=True):
+def solve_sudoku(sudoku_values, flag_greedy=True, flag_combinatorial=True,
+                 event_sink=None, units=CLASSIC_UNITS, store=None,
+                 propagation=PROPAGATION_FULL):
     """ Sudoku solver
     
     Algorithm:
@@ -327,15 +504,37 @@ def solve_sudoku(sudoku_values, flag_greedy=True, flag_combinatorial=True):
     
     Argument: 
         sudoku_values (9x9 ndarray, required) -- given sudoku, to be solved
+        event_sink (callable, optional) -- receives solver events, see solve_sudoku_greedy and solve_sudoku_combinatorial. When it is None (default), no event is produced.
+        units (SudokuUnits, optional) -- units of the sudoku, classic sudoku by default (see units.py for variants)
+        store (SolutionStore, optional) -- persistent store looked up before solving, the solution is kept in it (see solution_store.py)
+        propagation (str or AdaptivePropagation, optional) -- propagation at every node of the combinatorial search, see solve_sudoku_combinatorial
     
     Return:
         sudoku_values (9x9 ndarray), with empty cells (typically in the form
         of 0, but could be any number other than 1 - 9) filled
     """
+    if store is not None:
+        sudoku_solution = store.get(sudoku_values, units)
+        if sudoku_solution is not None:
+            if event_sink is not None:
+                event_sink(EVENT_SOLUTION_FOUND, None, None, None, None)
+            return sudoku_solution
+        sudoku_input = sudoku_values.copy()
+
     if flag_greedy:
-        sudoku_values = solve_sudoku_greedy(sudoku_values)
+        sudoku_values = solve_sudoku_greedy(
+            sudoku_values, event_sink=event_sink, units=units)
     if flag_combinatorial:
-        sudoku_values = solve_sudoku_combinatorial(sudoku_values)
+        sudoku_values = solve_sudoku_combinatorial(
+            sudoku_values, event_sink=event_sink, units=units,
+            propagation=propagation)
+    elif event_sink is not None and validate_sudoku(sudoku_values, units):
+        # # without the combinatorial search, nobody else reports the solution
+        event_sink(EVENT_SOLUTION_FOUND, None, None, None, None)
+
+    if store is not None and sudoku_values is not None and \
+            validate_sudoku(sudoku_values, units):
+        store.put(sudoku_input, sudoku_values, units)
     return sudoku_values
 
 
@@ -393,13 +592,32 @@ if __name__ == "__main__":
     group.add_argument(
         "-c", "--combinatorial", action="store_true",
         help="Use only the combinatorial (recursive) search to solve sudoku")
+    group.add_argument(
+        "-p", "--portfolio", action="store_true",
+        help="Race several search strategies in parallel and keep the fastest")
+    group.add_argument(
+        "-a", "--adaptive", action="store_true",
+        help="Pick the search strategy from cheap features of the sudoku")
+    parser.add_argument(
+        "--thresholds", dest="thresholds_filename",
+        help="Thresholds of the adaptive search (JSON written by dispatch.py)")
+    parser.add_argument(
+        "--propagation", choices=PROPAGATION_LEVELS, default=PROPAGATION_FULL,
+        help="Propagation at every node of the combinatorial search (default: full)")
+    parser.add_argument(
+        "--store", dest="store_filename",
+        help="Solution store filename, solved sudoku are looked up and kept in it")
+    parser.add_argument(
+        "--profile", dest="flamegraph_filename",
+        help="Profile the solver: print the time (and allocations) of every "
+             "phase and write the collapsed stacks to this file, for flamegraph.pl")
 
     # # get command line input
     args = parser.parse_args()
 
-    # # load sudoku
+    # # load sudoku, classic or variant
     try:
-        sudoku_values = np.loadtxt(args.in_filename, delimiter=",", dtype="i4")
+        sudoku_values, units = load_sudoku(args.in_filename)
     except IOError:
         print "ERROR! File {} cannot be found!".format(args.in_filename)
         sys.exit()
@@ -413,11 +631,57 @@ if __name__ == "__main__":
         args.combinatorial = True
 
     # # solve sudoku
-    sudoku_solution = solve_sudoku(
-        sudoku_values,
-        flag_greedy=args.greedy,
-        flag_combinatorial=args.combinatorial)
-    if validate_sudoku(sudoku_solution):
+    if args.portfolio and units is not CLASSIC_UNITS:
+        print "ERROR! The portfolio solver only supports classic sudoku!"
+        sys.exit()
+    if args.store_filename is not None and (
+            args.portfolio or args.adaptive or args.flamegraph_filename is not None):
+        print "ERROR! The solution store cannot be used with -p, -a or --profile!"
+        sys.exit()
+    if args.portfolio:
+        from portfolio import solve_sudoku_portfolio
+        sudoku_solution, strategy_name = solve_sudoku_portfolio(sudoku_values)
+        if sudoku_solution is None:
+            sudoku_solution = sudoku_values
+        else:
+            print "Solved by the {} strategy".format(strategy_name)
+    elif args.adaptive:
+        from dispatch import (
+            DEFAULT_THRESHOLDS, load_thresholds, solve_sudoku_adaptive)
+        thresholds = DEFAULT_THRESHOLDS
+        if args.thresholds_filename is not None:
+            thresholds = load_thresholds(args.thresholds_filename)
+        sudoku_solution, strategy_name = solve_sudoku_adaptive(
+            sudoku_values, thresholds, units)
+        if sudoku_solution is None:
+            sudoku_solution = sudoku_values
+            print "No solution found with the {} strategy".format(strategy_name)
+        else:
+            print "Solved with the {} strategy".format(strategy_name)
+    elif args.flamegraph_filename is not None:
+        from profiling import SolverProfiler, print_summary
+        profiler = SolverProfiler()
+        sudoku_solution = profiler.solve(
+            sudoku_values,
+            flag_greedy=args.greedy,
+            flag_combinatorial=args.combinatorial,
+            units=units,
+            propagation=args.propagation)
+        print_summary(profiler.summary())
+        profiler.write_flamegraph(args.flamegraph_filename)
+    else:
+        store = None
+        if args.store_filename is not None:
+            from solution_store import SolutionStore
+            store = SolutionStore(args.store_filename)
+        sudoku_solution = solve_sudoku(
+            sudoku_values,
+            flag_greedy=args.greedy,
+            flag_combinatorial=args.combinatorial,
+            units=units,
+            store=store,
+            propagation=args.propagation)
+    if validate_sudoku(sudoku_solution, units):
         print "The sudoku is solved:"
     else:
         print "The sudoku is not finished yet:"
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from sudoku_solver.bitmasks import *
+
+""" Unit tests for the bitmask candidate state
+"""
+
+
+def test_initial_state():
+    """ Filled cells have no candidate, and their value is removed from their peers
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    values, candidates = initial_state(sudoku_values)
+    assert values == list(sudoku_values.ravel())
+    for cell in range(81):
+        if values[cell] != 0:
+            assert candidates[cell] == 0
+            for peer in PEERS[cell]:
+                assert not candidates[peer] & (1 << values[cell])
+
+
+def test_assign_contradiction():
+    """ A value already used by a peer raises Contradiction
+    """
+    values, candidates = initial_state(np.zeros((9, 9), dtype="i4"))
+    assign(values, candidates, 0, 5)
+    with pytest.raises(Contradiction):
+        assign(values, candidates, 8, 5)
+
+
+def test_propagate_singles():
+    """ Naked and hidden singles solve an easy sudoku
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_example_out.csv", delimiter=",", dtype="i4")
+    values, candidates = initial_state(sudoku_values)
+    propagate_singles(values, candidates)
+    assert values == list(sudoku_expected_output.ravel())
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from sudoku_solver.units import *
+from sudoku_solver.dispatch import *
+
+""" Unit tests for the adaptive strategy selection
+"""
+
+
+def test_compute_features():
+    """ Features of an easy sudoku with many clues
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    features = compute_features(sudoku_values)
+    assert features["clues"] == 55
+    assert sum(features["candidate_counts"]) == 81 - 55
+    assert features["candidate_counts"][0] == 0
+    assert features["first_round_fill"] == \
+        float(features["candidate_counts"][1]) / (81 - 55)
+
+
+def test_choose_strategy():
+    """ Easy sudoku go to the greedy search, hard ones to the fallback strategy
+    """
+    thresholds = {"min_clues": 30, "min_first_round_fill": 0.1,
+                  "fallback_strategy": STRATEGY_FAST_SEARCH}
+    easy_features = compute_features(
+        np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4"))
+    hard_features = compute_features(
+        np.loadtxt("data/sudoku_hard18_in.csv", delimiter=",", dtype="i4"))
+    assert choose_strategy(easy_features, thresholds) == STRATEGY_GREEDY
+    assert choose_strategy(hard_features, thresholds) == STRATEGY_FAST_SEARCH
+    # # with the default thresholds, every classic sudoku goes to the fast search
+    assert choose_strategy(easy_features) == STRATEGY_FAST_SEARCH
+    # # the fast search only supports classic sudoku
+    variant_units = make_units(variants=[VARIANT_DIAGONAL])
+    assert choose_strategy(hard_features, thresholds, variant_units) == STRATEGY_SEARCH
+    with pytest.raises(ValueError):
+        choose_strategy(hard_features, dict(thresholds, fallback_strategy=STRATEGY_GREEDY))
+
+
+def test_solve_sudoku_adaptive():
+    """ The adaptive solver solves classic and variant sudoku
+    """
+    for sudoku_name in ["example", "hard18"]:
+        sudoku_values = np.loadtxt(
+            "data/sudoku_{}_in.csv".format(sudoku_name), delimiter=",", dtype="i4")
+        sudoku_expected_output = np.loadtxt(
+            "data/sudoku_{}_out.csv".format(sudoku_name), delimiter=",", dtype="i4")
+        sudoku_solution, _ = solve_sudoku_adaptive(sudoku_values)
+        assert (sudoku_solution == sudoku_expected_output).all()
+
+    sudoku_values, units = load_sudoku("data/variants/sudoku_jigsaw1_in.csv")
+    sudoku_expected_output = np.loadtxt(
+        "data/variants/sudoku_jigsaw1_out.csv", delimiter=",", dtype="i4")
+    sudoku_solution, strategy = solve_sudoku_adaptive(sudoku_values, units=units)
+    assert strategy != STRATEGY_FAST_SEARCH
+    assert (sudoku_solution == sudoku_expected_output).all()
+
+
+def test_tune_thresholds():
+    """ Tuning returns thresholds with the same keys as the default ones
+    """
+    sudoku_filenames = ["data/sudoku_example_in.csv", "data/sudoku_easy1_in.csv"]
+    thresholds, total_time = tune_thresholds(sudoku_filenames)
+    assert set(thresholds) == set(DEFAULT_THRESHOLDS)
+    assert thresholds["fallback_strategy"] in [
+        STRATEGY_GREEDY, STRATEGY_SEARCH, STRATEGY_FAST_SEARCH]
+    assert total_time > 0
+
+
+def test_tune_thresholds_without_greedy():
+    """ Tuning without the greedy strategy never routes a sudoku to it
+    """
+    sudoku_filenames = ["data/sudoku_example_in.csv", "data/sudoku_easy1_in.csv"]
+    thresholds, _ = tune_thresholds(
+        sudoku_filenames, strategies=(STRATEGY_SEARCH, STRATEGY_FAST_SEARCH))
+    assert thresholds["fallback_strategy"] in [STRATEGY_SEARCH, STRATEGY_FAST_SEARCH]
+    for sudoku_filename in sudoku_filenames:
+        features = compute_features(
+            np.loadtxt(sudoku_filename, delimiter=",", dtype="i4"))
+        assert choose_strategy(features, thresholds) != STRATEGY_GREEDY
+
+
+def test_solve_sudoku_adaptive_greedy_fallback():
+    """ The greedy search alone solves easy sudoku, the fallback strategy finishes the others
+    """
+    thresholds = {"min_clues": 0, "min_first_round_fill": 0.0,
+                  "fallback_strategy": STRATEGY_SEARCH}
+    for sudoku_name, expected_strategy in [("example", STRATEGY_GREEDY),
+                                           ("hard18", STRATEGY_SEARCH)]:
+        sudoku_values = np.loadtxt(
+            "data/sudoku_{}_in.csv".format(sudoku_name), delimiter=",", dtype="i4")
+        sudoku_expected_output = np.loadtxt(
+            "data/sudoku_{}_out.csv".format(sudoku_name), delimiter=",", dtype="i4")
+        sudoku_solution, strategy = solve_sudoku_adaptive(sudoku_values, thresholds)
+        assert strategy == expected_strategy
+        assert (sudoku_solution == sudoku_expected_output).all()
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from sudoku_solver.sudoku import *
+from sudoku_solver.loadtest import *
+
+""" Unit tests for the load-testing harness
+"""
+
+
+def test_latency_histogram():
+    """ Percentiles are within the relative error of the histogram
+    """
+    histogram = LatencyHistogram()
+    for latency in range(1, 1001):
+        histogram.record(latency * 1e-3)
+    summary = histogram.to_dict()
+    assert summary["count"] == 1000
+    assert summary["max"] == 1000000
+    for percentile, expected in [(50, 500000), (95, 950000), (99, 990000)]:
+        assert expected <= summary[("p%d" % percentile)] <= expected * 1.01
+    assert sum(count for _, count in summary["buckets"]) == 1000
+
+
+def test_generate_corpus():
+    """ Generated puzzles keep the clues count and have a valid solution
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    corpus = generate_corpus([sudoku_values], 5, seed=0)
+    assert len(corpus) == 5
+    for new_values in corpus:
+        assert (new_values > 0).sum() == (sudoku_values > 0).sum()
+        assert validate_sudoku(solve_sudoku(new_values.copy()))
+
+
+def test_run_load_test():
+    """ Every request is solved and timed, in closed and open loop
+    """
+    puzzles = load_puzzles(["data/sudoku_example_in.csv"])
+    for rate in [None, 1000]:
+        results = run_load_test(puzzles, 10, concurrency=2, rate=rate)
+        assert results["errors"] == 0
+        assert results["latency_us"]["count"] == 10
+        assert results["latency_us"]["p50"] <= results["latency_us"]["max"]
+        assert results["max_rss_kb"]["self"] >= \
+            results["max_rss_kb"]["self_before_run"] > 0
+        assert results["max_rss_kb"]["scope"] == "process"
+        assert results["run_max_rss_kb"] is None or results["run_max_rss_kb"] > 0
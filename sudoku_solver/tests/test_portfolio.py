@@ -0,0 +1,87 @@
+import numpy as np
+import os
+import pytest
+
+from sudoku_solver.sudoku import *
+from sudoku_solver.portfolio import *
+
+""" Unit tests for the portfolio solver
+"""
+
+
+def test_solve_sudoku_randomized():
+    """ Every seed gives the same (unique) solution of a hard sudoku
+    """
+    sudoku_values = np.loadtxt("data/sudoku_hard20_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_hard20_out.csv", delimiter=",", dtype="i4")
+    for seed in range(5):
+        sudoku_solution = solve_sudoku_randomized(
+            sudoku_values, seed=seed, initial_node_limit=1)
+        assert (sudoku_solution == sudoku_expected_output).all()
+
+
+def test_solve_sudoku_randomized_without_solution():
+    """ A sudoku with two equal values in a row has no solution
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    sudoku_values[0, 0] = 3
+    assert solve_sudoku_randomized(sudoku_values) is None
+
+
+def test_solve_sudoku_portfolio():
+    """ The portfolio returns the solution and the name of the winning strategy
+    """
+    sudoku_values = np.loadtxt("data/sudoku_hard18_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_hard18_out.csv", delimiter=",", dtype="i4")
+    sudoku_solution, name = solve_sudoku_portfolio(sudoku_values)
+    assert (sudoku_solution == sudoku_expected_output).all()
+    assert name in [strategy_name for strategy_name, _ in DEFAULT_STRATEGIES]
+
+
+def test_solve_sudoku_portfolio_ignores_invalid_solutions():
+    """ An incomplete greedy solution does not win over a valid one
+
+    The input is from sudoku_hard18, which the greedy search cannot solve.
+    """
+    sudoku_values = np.loadtxt("data/sudoku_hard18_in.csv", delimiter=",", dtype="i4")
+    strategies = (
+        ("greedy", solve_sudoku_greedy),
+        ("randomized", solve_sudoku_randomized))
+    sudoku_solution, name = solve_sudoku_portfolio(sudoku_values, strategies)
+    assert name == "randomized"
+    assert validate_sudoku(sudoku_solution)
+
+
+def _raising_solver(sudoku_values):
+    raise ValueError("strategy failed")
+
+
+def _exiting_solver(sudoku_values):
+    # # the worker dies without reporting, as if it was killed
+    os._exit(1)
+
+
+def test_solve_sudoku_portfolio_failing_strategies():
+    """ Strategies that raise or die do not make the race hang
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    sudoku_values[0, 0] = 3
+    strategies = (
+        ("raising", _raising_solver),
+        ("exiting", _exiting_solver),
+        ("randomized", solve_sudoku_randomized))
+    assert solve_sudoku_portfolio(sudoku_values, strategies) == (None, None)
+
+    sudoku_values = np.loadtxt("data/sudoku_hard18_in.csv", delimiter=",", dtype="i4")
+    sudoku_solution, name = solve_sudoku_portfolio(sudoku_values, strategies)
+    assert name == "randomized"
+    assert validate_sudoku(sudoku_solution)
+
+
+def test_benchmark_portfolio_win_rates():
+    """ Win rates add up to one
+    """
+    win_rates = benchmark_portfolio(
+        ["data/sudoku_example_in.csv", "data/sudoku_hard19_in.csv"])
+    assert win_rates[None] == 0
+    assert abs(sum(win_rates.values()) - 1) < 1e-9
@@ -0,0 +1,110 @@
+import numpy as np
+import pstats
+import pytest
+
+from sudoku_solver.profiling import *
+
+""" Unit tests for the profiling mode
+"""
+
+
+def test_solver_profiler_phases():
+    """ The profiler solves the sudoku and the phases add up to the total time
+    """
+    sudoku_values = np.loadtxt("data/sudoku_medium15_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_medium15_out.csv", delimiter=",", dtype="i4")
+    profiler = SolverProfiler()
+    sudoku_solution = profiler.solve(sudoku_values)
+    assert (sudoku_solution == sudoku_expected_output).all()
+
+    summary = profiler.summary()
+    assert summary["number_of_puzzles"] == 1
+    assert summary["total_time"] == pytest.approx(
+        sum(statistics["time"] for statistics in summary["phases"].values()))
+    for phase in [PHASE_GREEDY, PHASE_CANDIDATES, PHASE_HIDDEN_SINGLES, PHASE_SEARCH]:
+        assert summary["phases"][phase]["calls"] > 0
+    assert summary["functions"][0]["own_time"] >= summary["functions"][-1]["own_time"]
+
+
+def test_solver_profiler_outputs(tmpdir):
+    """ The collapsed stacks and the cProfile statistics are written
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    profiler = SolverProfiler()
+    profiler.solve(sudoku_values)
+
+    flamegraph_filename = str(tmpdir.join("solver.folded"))
+    profiler.write_flamegraph(flamegraph_filename)
+    with open(flamegraph_filename) as flamegraph_file:
+        lines = flamegraph_file.read().splitlines()
+    assert lines
+    for line in lines:
+        stack, weight = line.rsplit(" ", 1)
+        assert stack.split(";")[0] == "solve"
+        assert int(weight) > 0
+    assert any("exclude_values_appeared_in_same_row_column_block" in line
+               for line in lines)
+
+    pstats_filename = str(tmpdir.join("solver.pstats"))
+    profiler.write_pstats(pstats_filename)
+    assert pstats.Stats(pstats_filename).total_calls > 0
+
+    if not profiler.trace_memory:
+        with pytest.raises(ValueError):
+            profiler.write_flamegraph(flamegraph_filename, METRIC_MEMORY)
+
+
+class _FakeTracemalloc(object):
+    """ tracemalloc whose traced memory grows by 8 bytes at every reading,
+    with a peak 100 bytes above it, as if every call allocated a temporary
+    """
+
+    def __init__(self):
+        self.tracing = False
+        self.memory = 0
+        self.peak = 0
+
+    def start(self):
+        self.tracing = True
+
+    def stop(self):
+        self.tracing = False
+
+    def get_traced_memory(self):
+        assert self.tracing
+        self.memory += 8
+        self.peak = self.memory + 100
+        return self.memory, self.peak
+
+
+def test_solver_profiler_memory(tmpdir, monkeypatch):
+    """ The allocations are charged to the phases and to the memory flamegraph
+    """
+    fake_tracemalloc = _FakeTracemalloc()
+    monkeypatch.setattr("sudoku_solver.profiling.tracemalloc", fake_tracemalloc)
+    sudoku_values = np.loadtxt("data/sudoku_medium15_in.csv", delimiter=",", dtype="i4")
+    profiler = SolverProfiler()
+    assert profiler.trace_memory
+    profiler.solve(sudoku_values)
+    assert not fake_tracemalloc.tracing
+
+    phases = profiler.summary()["phases"]
+    for phase in [PHASE_GREEDY, PHASE_CANDIDATES, PHASE_HIDDEN_SINGLES, PHASE_SEARCH]:
+        assert phases[phase]["allocated"] > 0
+        assert 0 < phases[phase]["peak"] <= fake_tracemalloc.peak
+        # # the peaks are the ones traced between two events, never a current value
+        assert phases[phase]["peak"] % 8 == 4
+    assert sum(phase["allocated"] for phase in phases.values()) == \
+        sum(profiler.stack_allocations.values())
+
+    flamegraph_filename = str(tmpdir.join("solver_memory.folded"))
+    profiler.write_flamegraph(flamegraph_filename, METRIC_MEMORY)
+    with open(flamegraph_filename) as flamegraph_file:
+        lines = flamegraph_file.read().splitlines()
+    assert len(lines) == len(profiler.stack_allocations)
+    for line in lines:
+        stack, weight = line.rsplit(" ", 1)
+        assert stack.split(";")[0] == "solve"
+        assert int(weight) > 0 and int(weight) % 8 == 0
+    assert any("exclude_values_appeared_in_same_row_column_block" in line
+               for line in lines)
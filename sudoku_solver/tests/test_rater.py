@@ -0,0 +1,69 @@
+import glob
+
+import numpy as np
+import pytest
+
+from sudoku_solver.sudoku import *
+from sudoku_solver.rater import *
+
+""" Unit tests for the difficulty rater
+"""
+
+
+def test_rate_sudoku_easy_needs_naked_singles_only():
+    """ The example given in the challenge is solved by naked singles
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_example_out.csv", delimiter=",", dtype="i4")
+    rating = rate_sudoku(sudoku_values)
+    assert rating["grade"] == 1
+    assert rating["hardest_technique"] == TECHNIQUE_NAKED_SINGLE
+    assert rating["branches"] == 0
+    assert (rating["solution"] == sudoku_expected_output).all()
+
+
+def test_rate_sudoku_hard_rated_above_medium():
+    """ Hard sudoku puzzles need harder techniques than medium ones
+    """
+    medium_grades = [
+        rate_sudoku(np.loadtxt(filename, delimiter=",", dtype="i4"))["grade"]
+        for filename in glob.glob("data/sudoku_medium*_in.csv")]
+    hard_grades = [
+        rate_sudoku(np.loadtxt(filename, delimiter=",", dtype="i4"))["grade"]
+        for filename in glob.glob("data/sudoku_hard*_in.csv")]
+    assert min(hard_grades) > max(medium_grades)
+
+
+def test_rate_sudoku_with_search():
+    """ A sudoku with few clues needs search, and still gets a valid solution
+
+    The input is the first three rows of the sudoku_hard18 solution.
+    """
+    sudoku_values = np.loadtxt("data/sudoku_hard18_out.csv", delimiter=",", dtype="i4")
+    sudoku_values[3:, :] = 0
+    rating = rate_sudoku(sudoku_values)
+    assert rating["hardest_technique"] == TECHNIQUE_SEARCH
+    assert rating["branches"] > 0
+    assert rating["grade"] > TECHNIQUE_LEVELS[TECHNIQUE_SEARCH]
+    assert validate_sudoku(rating["solution"])
+
+
+def test_rate_sudoku_without_solution():
+    """ A sudoku with two equal values in a row has no solution
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    sudoku_values[0, 0] = 3
+    rating = rate_sudoku(sudoku_values)
+    assert rating["grade"] is None
+    assert rating["solution"] is None
+
+
+def test_rate_sudoku_files_in_parallel():
+    """ Rating files in worker processes gives the same grades, in order
+    """
+    sudoku_filenames = sorted(glob.glob("data/sudoku_*_in.csv"))
+    ratings = list(rate_sudoku_files(sudoku_filenames, processes=2))
+    assert [filename for filename, _ in ratings] == sudoku_filenames
+    for filename, rating in ratings:
+        expected_rating = rate_sudoku(np.loadtxt(filename, delimiter=",", dtype="i4"))
+        assert rating["grade"] == expected_rating["grade"]
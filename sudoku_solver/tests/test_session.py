@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from sudoku_solver.sudoku import *
+from sudoku_solver.session import *
+
+""" Unit tests for the incremental solving session
+"""
+
+
+def test_session_place_erase_undo():
+    """ Candidates follow every place, erase and undo
+
+    The input is the example given in the challenge. Cell on row 4, column 0
+    can be 5, 6 or 9, cell on row 4, column 1 can be 7 or 9.
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    session = SudokuSession(sudoku_values)
+    assert session.candidates(4, 0) == [5, 6, 9]
+    assert session.candidates(4, 1) == [7, 9]
+
+    session.place(4, 0, 5)
+    assert session.candidates(4, 0) == []
+    assert session.candidates(4, 1) == [7, 9]
+    assert session.sudoku_values[4, 0] == 5
+
+    session.place(4, 0, 9)
+    assert session.candidates(4, 1) == [7]
+    session.erase(4, 0)
+    assert session.candidates(4, 1) == [7, 9]
+
+    assert session.undo() == (4, 0)
+    assert session.sudoku_values[4, 0] == 9
+    assert session.undo() == (4, 0)
+    assert session.sudoku_values[4, 0] == 5
+    assert session.undo() == (4, 0)
+    assert session.sudoku_values[4, 0] == 0
+    assert session.undo() is None
+    assert (session.sudoku_values == sudoku_values).all()
+
+
+def test_session_given_cells_cannot_change():
+    """ Cells given in the original sudoku cannot be edited
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    session = SudokuSession(sudoku_values)
+    with pytest.raises(ValueError):
+        session.place(0, 1, 1)
+    with pytest.raises(ValueError):
+        session.erase(0, 1)
+    with pytest.raises(ValueError):
+        session.place(0, 0, 10)
+
+
+def test_session_hints_solve_sudoku():
+    """ Following the hints solves a sudoku that the greedy search can solve
+
+    The input is from sudoku_medium16.
+    """
+    sudoku_values = np.loadtxt("data/sudoku_medium16_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_medium16_out.csv", delimiter=",", dtype="i4")
+    session = SudokuSession(sudoku_values)
+    hint = session.hint()
+    while hint is not None:
+        row, column, value, technique = hint
+        assert value == sudoku_expected_output[row, column]
+        session.place(row, column, value)
+        hint = session.hint()
+    assert (session.sudoku_values == sudoku_expected_output).all()
+
+
+def test_session_is_still_solvable():
+    """ A wrong value can make the sudoku unsolvable, undo makes it solvable again
+
+    The input is from sudoku_hard18, which has a unique solution, so any
+    other candidate of the first empty cell leads to a dead end.
+    """
+    sudoku_values = np.loadtxt("data/sudoku_hard18_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_hard18_out.csv", delimiter=",", dtype="i4")
+    session = SudokuSession(sudoku_values)
+    assert session.is_still_solvable()
+
+    row, column = np.argwhere(sudoku_values == 0)[0]
+    wrong_values = [value for value in session.candidates(row, column)
+                    if value != sudoku_expected_output[row, column]]
+    session.place(row, column, wrong_values[0])
+    assert not session.is_still_solvable()
+    session.undo()
+    assert session.is_still_solvable()
+
+    # # a conflicting value is accepted but makes the sudoku unsolvable
+    session.place(row, column, sudoku_values[row, :].max())
+    assert not session.is_still_solvable()
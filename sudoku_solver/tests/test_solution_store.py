@@ -0,0 +1,113 @@
+import numpy as np
+import multiprocessing
+import pytest
+import sqlite3
+
+from sudoku_solver.sudoku import *
+from sudoku_solver.units import *
+from sudoku_solver.solution_store import *
+
+""" Unit tests for the persistent solution store
+"""
+
+
+def _put_puzzles(store_filename, first_value):
+    """ Put 9 puzzles, made from one solution, into a store from another process
+    """
+    sudoku_solution = np.loadtxt("data/sudoku_example_out.csv", delimiter=",", dtype="i4")
+    store = SolutionStore(store_filename)
+    for cell in range(9):
+        sudoku_values = sudoku_solution.copy()
+        sudoku_values.flat[first_value * 9 + cell] = 0
+        store.put(sudoku_values, sudoku_solution)
+
+
+def test_puzzle_key():
+    """ The key is 41 bytes for a classic sudoku, and depends on the units
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    key = puzzle_key(sudoku_values)
+    assert len(key) == 41
+    assert key != puzzle_key(sudoku_values, make_units(variants=[VARIANT_DIAGONAL]))
+    sudoku_values[0, 0] = 10 - sudoku_values[0, 0] if sudoku_values[0, 0] else 1
+    assert key != puzzle_key(sudoku_values)
+
+
+def test_solve_sudoku_with_store(tmpdir):
+    """ solve_sudoku keeps the solution, and another store on the same file finds it
+    """
+    store_filename = str(tmpdir.join("store.db"))
+    sudoku_values = np.loadtxt("data/sudoku_hard18_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_hard18_out.csv", delimiter=",", dtype="i4")
+    with SolutionStore(store_filename) as store:
+        assert store.get(sudoku_values) is None
+        sudoku_solution = solve_sudoku(sudoku_values.copy(), store=store)
+        assert (sudoku_solution == sudoku_expected_output).all()
+        assert len(store) == 1
+
+    with SolutionStore(store_filename) as store:
+        assert (store.get(sudoku_values) == sudoku_expected_output).all()
+        # # the store is consulted before solving
+        store.put(sudoku_values, np.ones((9, 9), dtype="i4"))
+        assert len(store) == 1
+        assert (solve_sudoku(sudoku_values.copy(), store=store) == 1).all()
+
+
+def test_solution_store_eviction(tmpdir):
+    """ The least recently used solutions are evicted beyond max_entries
+    """
+    sudoku_solution = np.loadtxt("data/sudoku_example_out.csv", delimiter=",", dtype="i4")
+    sudoku_values_list = []
+    for cell in range(20):
+        sudoku_values = sudoku_solution.copy()
+        sudoku_values.flat[cell] = 0
+        sudoku_values_list.append(sudoku_values)
+
+    with SolutionStore(str(tmpdir.join("store.db")), max_entries=10) as store:
+        for sudoku_values in sudoku_values_list[:10]:
+            store.put(sudoku_values, sudoku_solution)
+        store.get(sudoku_values_list[0])
+        store.put(sudoku_values_list[10], sudoku_solution)
+        assert len(store) <= 10
+        assert store.get(sudoku_values_list[0]) is not None
+        assert store.get(sudoku_values_list[1]) is None
+        assert store.get(sudoku_values_list[10]) is not None
+
+
+def test_solution_store_get_while_writing(tmpdir):
+    """ Opening a store and a lookup neither wait for nor fail because of another connection writing
+    """
+    store_filename = str(tmpdir.join("store.db"))
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    sudoku_solution = np.loadtxt("data/sudoku_example_out.csv", delimiter=",", dtype="i4")
+    with SolutionStore(store_filename, timeout=5.0) as store:
+        store.put(sudoku_values, sudoku_solution)
+        writer = sqlite3.connect(store_filename, isolation_level=None)
+        writer.execute("BEGIN IMMEDIATE")
+        try:
+            assert (store.get(sudoku_values) == sudoku_solution).all()
+            # # another store, e.g. of a new process, is opened without the write lock
+            with SolutionStore(store_filename, timeout=1.0) as other_store:
+                assert (other_store.get(sudoku_values) == sudoku_solution).all()
+                assert len(other_store) == 1
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+        # # the lookup does not leave the store without a busy timeout
+        assert store._connect().execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_solution_store_processes(tmpdir):
+    """ Several processes write to the same store
+    """
+    store_filename = str(tmpdir.join("store.db"))
+    SolutionStore(store_filename).close()
+    processes = [
+        multiprocessing.Process(target=_put_puzzles, args=(store_filename, value))
+        for value in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    with SolutionStore(store_filename) as store:
+        assert len(store) == 36
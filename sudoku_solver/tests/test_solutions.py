@@ -0,0 +1,66 @@
+import itertools
+import json
+
+import numpy as np
+import pytest
+
+from sudoku_solver.sudoku import *
+from sudoku_solver.solutions import *
+
+""" Unit tests for the solution enumerator
+"""
+
+
+def test_iter_solutions_unique_solution():
+    """ A published sudoku has exactly one solution
+    """
+    sudoku_values = np.loadtxt("data/sudoku_hard18_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_hard18_out.csv", delimiter=",", dtype="i4")
+    solutions = list(iter_solutions(sudoku_values))
+    assert len(solutions) == 1
+    assert (solutions[0][0] == sudoku_expected_output).all()
+
+
+def test_iter_solutions_all_solutions():
+    """ All the solutions are generated, each of them once
+
+    The input is the sudoku_hard18 solution without its 1s, 2s and 3s, which
+    has 36 solutions (counted by brute force).
+    """
+    sudoku_values = np.loadtxt("data/sudoku_hard18_out.csv", delimiter=",", dtype="i4")
+    sudoku_values[sudoku_values <= 3] = 0
+    solutions = [sudoku_solution for sudoku_solution, _ in iter_solutions(sudoku_values)]
+    assert len(solutions) == 36
+    assert len(set(sudoku_solution.tostring() for sudoku_solution in solutions)) == 36
+    for sudoku_solution in solutions:
+        assert validate_sudoku(sudoku_solution)
+        assert (sudoku_solution[sudoku_values > 0] == sudoku_values[sudoku_values > 0]).all()
+
+
+def test_iter_solutions_resume_from_cursor():
+    """ Resuming from the cursor of a solution continues right after it
+
+    The input is the first three rows of the sudoku_hard18 solution, which
+    has a huge number of solutions.
+    """
+    sudoku_values = np.loadtxt("data/sudoku_hard18_out.csv", delimiter=",", dtype="i4")
+    sudoku_values[3:, :] = 0
+    solutions = list(itertools.islice(iter_solutions(sudoku_values), 200))
+
+    # # the cursor goes through JSON, as it would between processes
+    cursor = json.loads(json.dumps(solutions[99][1]))
+    resumed_solutions = list(itertools.islice(
+        iter_solutions(sudoku_values, cursor), 100))
+    for (sudoku_solution, cursor), (resumed_solution, resumed_cursor) in \
+            zip(solutions[100:], resumed_solutions):
+        assert (sudoku_solution == resumed_solution).all()
+        assert cursor == resumed_cursor
+
+
+def test_iter_solutions_cursor_of_another_sudoku():
+    """ A cursor that does not match the sudoku is rejected
+    """
+    sudoku_values = np.loadtxt("data/sudoku_hard18_out.csv", delimiter=",", dtype="i4")
+    sudoku_values[3:, :] = 0
+    with pytest.raises(ValueError):
+        list(iter_solutions(sudoku_values, [[80, 1]]))
@@ -0,0 +1,90 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from sudoku_solver.sudoku import *
+from sudoku_solver.solver_pool import *
+
+""" Unit tests for the pool of solver processes
+"""
+
+
+def test_solver_pool_map():
+    """ map returns the solutions in the input order, with fewer slots than puzzles
+    """
+    sudoku_input_filenames = sorted(glob.glob("data/sudoku_*_in.csv"))
+    sudoku_inputs = [np.loadtxt(filename, delimiter=",", dtype="i4")
+                     for filename in sudoku_input_filenames]
+    with SolverPool(processes=2, slots=3) as pool:
+        sudoku_outputs = pool.map(sudoku_inputs)
+
+    for filename, sudoku_output in zip(sudoku_input_filenames, sudoku_outputs):
+        sudoku_expected_output = np.loadtxt(
+            filename.replace("_in.csv", "_out.csv"), delimiter=",", dtype="i4")
+        assert (sudoku_expected_output == sudoku_output).all()
+
+
+def test_solver_pool_submit():
+    """ submit returns a future, the solver returning None gives None
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_example_out.csv", delimiter=",", dtype="i4")
+    sudoku_without_solution = sudoku_values.copy()
+    sudoku_without_solution[0, 0] = 3
+
+    with SolverPool(processes=1) as pool:
+        future = pool.submit(sudoku_values)
+        future_without_solution = pool.submit(sudoku_without_solution)
+        assert (future.result(timeout=60) == sudoku_expected_output).all()
+        assert future.done()
+        assert future_without_solution.result(timeout=60) is None
+
+    with pytest.raises(ValueError):
+        pool.submit(sudoku_values)
+
+
+def _failing_solver(sudoku_values):
+    raise ValueError("failing solver")
+
+
+def test_solver_pool_reports_solver_errors():
+    """ An exception raised by the solver is raised again by the future
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    with SolverPool(processes=1, solver=_failing_solver) as pool:
+        with pytest.raises(RuntimeError):
+            pool.submit(sudoku_values).result(timeout=60)
+
+
+def _exiting_solver(sudoku_values):
+    """ Solver whose process dies on an empty sudoku
+    """
+    if (sudoku_values == 0).all():
+        os._exit(1)
+    return solve_sudoku(sudoku_values)
+
+
+def _wrong_shape_solver(sudoku_values):
+    return np.zeros(3)
+
+
+def test_solver_pool_survives_dead_workers():
+    """ A sudoku whose worker dies fails, and the pool goes on with a new worker
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_example_out.csv", delimiter=",", dtype="i4")
+    with SolverPool(processes=1, slots=1, solver=_exiting_solver) as pool:
+        with pytest.raises(RuntimeError):
+            pool.submit(np.zeros((9, 9), dtype="i4")).result(timeout=60)
+        assert (pool.submit(sudoku_values).result(timeout=60) ==
+                sudoku_expected_output).all()
+        futures = [pool.submit(np.zeros((9, 9), dtype="i4")), pool.submit(sudoku_values)]
+        with pytest.raises(RuntimeError):
+            futures[0].result(timeout=60)
+        assert (futures[1].result(timeout=60) == sudoku_expected_output).all()
+
+    with SolverPool(processes=1, slots=1, solver=_wrong_shape_solver) as pool:
+        with pytest.raises(RuntimeError):
+            pool.map([sudoku_values, sudoku_values])
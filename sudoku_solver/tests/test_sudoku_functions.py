@@ -260,3 +260,46 @@ def test_find_feasible_values_multiple_situation_in_one_sudoku():
     cell_values = find_feasible_values(sudoku_values, row, column)
     assert len(cell_values) == 4
     assert set(cell_values) == {5, 7, 8, 9}
+
+
+def test_solve_sudoku_combinatorial_propagation_levels():
+    """ Test if every propagation level gives the same solution
+    """
+    sudoku_input = np.loadtxt("data/sudoku_medium15_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_medium15_out.csv", delimiter=",", dtype="i4")
+    for propagation in PROPAGATION_LEVELS:
+        sudoku_output = solve_sudoku_combinatorial(
+            sudoku_input.copy(), propagation=propagation)
+        assert (sudoku_expected_output == sudoku_output).all()
+    with pytest.raises(ValueError):
+        solve_sudoku_combinatorial(sudoku_input.copy(), propagation="unknown")
+
+
+def test_solve_sudoku_adaptive_propagation_measurements():
+    """ Test if the adaptive propagation records the search nodes and the hidden singles
+    """
+    sudoku_input = np.loadtxt("data/sudoku_hard20_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_hard20_out.csv", delimiter=",", dtype="i4")
+    propagation = AdaptivePropagation(warmup_nodes=4, probe_interval=8)
+    sudoku_output = solve_sudoku(sudoku_input, propagation=propagation)
+    assert (sudoku_expected_output == sudoku_output).all()
+    assert propagation.number_of_nodes > 0
+    assert 0 < propagation.number_of_hidden_single_runs <= propagation.number_of_nodes
+    assert propagation.node_time > 0 and propagation.hidden_single_time > 0
+
+
+def test_adaptive_propagation_decision():
+    """ Test if hidden singles are kept while the node time they save exceeds their time
+    """
+    propagation = AdaptivePropagation(warmup_nodes=1, probe_interval=100)
+    propagation.record_node(0.001)
+    propagation.record_node_time(0.003)
+    propagation.record_node(0.002)
+    propagation.record_node_time(0.002)
+    assert propagation.number_of_nodes == 2
+    assert abs(propagation.node_time - 0.008) < 1e-12
+    # # one cell filled saves a mean node time of 4 ms
+    propagation.record_hidden_singles(0.003, 1)
+    assert propagation.use_hidden_singles()
+    propagation.record_hidden_singles(0.002, 0)
+    assert not propagation.use_hidden_singles()
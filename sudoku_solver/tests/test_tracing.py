@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from sudoku_solver.sudoku import *
+from sudoku_solver.tracing import *
+
+""" Unit tests for the solver event hooks and the trace file sink
+"""
+
+
+def test_solve_sudoku_reports_events_to_sink():
+    """ Every cell filled by the solver is reported, and the solution is found once
+
+    The input is from sudoku_hard18, which needs the combinatorial search.
+    """
+    sudoku_values = np.loadtxt("data/sudoku_hard18_in.csv", delimiter=",", dtype="i4")
+    events = []
+
+    def event_sink(event, row, column, value, technique):
+        events.append((event, row, column, value, technique))
+
+    sudoku_solution = solve_sudoku(sudoku_values, event_sink=event_sink)
+    assert validate_sudoku(sudoku_solution)
+
+    event_types = [event[0] for event in events]
+    assert event_types.count(EVENT_SOLUTION_FOUND) == 1
+    assert event_types[-1] == EVENT_SOLUTION_FOUND
+    assert event_types.count(EVENT_BRANCH_ENTERED) > 0
+
+    # # replaying the events on a copy of the input gives the solution
+    sudoku_values = np.loadtxt("data/sudoku_hard18_in.csv", delimiter=",", dtype="i4")
+    saved_sudoku_values = []
+    for event, row, column, value, technique in events:
+        if event == EVENT_BRANCH_ENTERED:
+            saved_sudoku_values.append(sudoku_values.copy())
+            sudoku_values[row, column] = value
+        elif event == EVENT_BACKTRACK:
+            sudoku_values = saved_sudoku_values.pop()
+        elif event == EVENT_CELL_ASSIGNED:
+            assert sudoku_values[row, column] == 0
+            sudoku_values[row, column] = value
+    assert (sudoku_values == sudoku_solution).all()
+
+
+def test_solve_sudoku_greedy_reports_techniques():
+    """ Greedy search only reports naked and hidden singles
+
+    The input is from sudoku_easy6, which is solved by the greedy search alone.
+    """
+    sudoku_values = np.loadtxt("data/sudoku_easy6_in.csv", delimiter=",", dtype="i4")
+    events = []
+
+    def event_sink(event, row, column, value, technique):
+        events.append((event, row, column, value, technique))
+
+    solve_sudoku(sudoku_values, flag_combinatorial=False, event_sink=event_sink)
+    assert events[-1][0] == EVENT_SOLUTION_FOUND
+    techniques = set(event[4] for event in events[:-1])
+    assert TECHNIQUE_SEARCH not in techniques
+    assert techniques <= {
+        TECHNIQUE_NAKED_SINGLE, TECHNIQUE_HIDDEN_SINGLE_BLOCK,
+        TECHNIQUE_HIDDEN_SINGLE_ROW, TECHNIQUE_HIDDEN_SINGLE_COLUMN}
+
+
+def test_trace_file_replay(tmpdir):
+    """ A trace file written while solving replays to the same solution
+    """
+    sudoku_values = np.loadtxt("data/sudoku_hard19_in.csv", delimiter=",", dtype="i4")
+    sudoku_expected_output = np.loadtxt("data/sudoku_hard19_out.csv", delimiter=",", dtype="i4")
+    trace_filename = str(tmpdir.join("trace.txt"))
+    with open(trace_filename, "w") as trace_file:
+        solve_sudoku(sudoku_values,
+                     event_sink=trace_file_sink(trace_file, sudoku_values))
+
+    for event, row, column, value, technique, sudoku_values in \
+            replay_trace(trace_filename):
+        pass
+    assert event == EVENT_SOLUTION_FOUND
+    assert (sudoku_values == sudoku_expected_output).all()
+
+
+def test_benchmark_disabled_hooks_counts_checks():
+    """ Test if the hook checks are the events of the solve, and cost less than 1% of it
+    """
+    sudoku_filename = "data/sudoku_hard20_in.csv"
+    results = benchmark_disabled_hooks([sudoku_filename], repeat=1)
+    event_sink, counts = counting_sink()
+    solve_sudoku(np.loadtxt(sudoku_filename, delimiter=",", dtype="i4"),
+                 event_sink=event_sink)
+    assert counts[EVENT_BRANCH_ENTERED] > 0
+    assert results[sudoku_filename]["number_of_checks"] == sum(counts.values())
+    # # the hooks cost less than 1% of the solve time when no sink is attached
+    assert 0 < results[sudoku_filename]["disabled_overhead"] < 0.01
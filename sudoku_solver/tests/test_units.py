@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from sudoku_solver.sudoku import *
+from sudoku_solver.units import *
+
+""" Unit tests for the units of sudoku variants
+"""
+
+
+def verify_variant_solution(sudoku_input_filename, sudoku_output_filename):
+    sudoku_input, units = load_sudoku(sudoku_input_filename)
+    assert units is not CLASSIC_UNITS
+    sudoku_output = solve_sudoku(sudoku_input, units=units)
+    sudoku_expected_output, _ = load_sudoku(sudoku_output_filename)
+    assert (sudoku_expected_output == sudoku_output).all()
+    assert validate_sudoku(sudoku_output, units)
+
+
+def test_classic_units():
+    """ A classic sudoku has 27 units, and every cell has 20 peers
+    """
+    assert len(CLASSIC_UNITS.units) == 27
+    for cell in range(81):
+        assert len(CLASSIC_UNITS.units_of_cell[cell]) == 3
+        assert len(CLASSIC_UNITS.peers[cell]) == 20
+
+
+def test_load_sudoku_classic():
+    """ A csv file without variant header is a classic sudoku
+    """
+    sudoku_values, units = load_sudoku("data/sudoku_example_in.csv")
+    assert units is CLASSIC_UNITS
+    assert sudoku_values.shape == (9, 9)
+
+
+def test_make_units_rejects_invalid_regions():
+    """ Every region must have 9 cells
+    """
+    regions = np.array([row // 3 * 3 + column // 3
+                        for row in range(9) for column in range(9)]).reshape((9, 9))
+    regions[0, 0] = 1
+    with pytest.raises(ValueError):
+        make_units(regions)
+    with pytest.raises(ValueError):
+        make_units(variants=["unknown"])
+
+
+def test_validate_sudoku_diagonal():
+    """ A classic solution with repeated values on a diagonal is not a valid X-sudoku
+    """
+    sudoku_values = np.loadtxt("data/sudoku_example_out.csv", delimiter=",", dtype="i4")
+    assert validate_sudoku(sudoku_values)
+    assert len(np.unique(np.diag(sudoku_values))) < 9
+    assert not validate_sudoku(sudoku_values, make_units(variants=[VARIANT_DIAGONAL]))
+
+
+def test_solve_sudoku_diagonal():
+    """ Test if the sudoku solver gives the same solution for an X-sudoku
+    """
+    verify_variant_solution(
+        "data/variants/sudoku_diagonal1_in.csv",
+        "data/variants/sudoku_diagonal1_out.csv")
+
+
+def test_solve_sudoku_windoku():
+    """ Test if the sudoku solver gives the same solution for a windoku
+    """
+    verify_variant_solution(
+        "data/variants/sudoku_windoku1_in.csv",
+        "data/variants/sudoku_windoku1_out.csv")
+
+
+def test_solve_sudoku_jigsaw():
+    """ Test if the sudoku solver gives the same solution for a jigsaw sudoku
+    """
+    verify_variant_solution(
+        "data/variants/sudoku_jigsaw1_in.csv",
+        "data/variants/sudoku_jigsaw1_out.csv")
@@ -0,0 +1,265 @@
+import numpy as np
+import argparse
+import timeit
+
+from sudoku import (
+    solve_sudoku, pretty_print,
+    EVENT_CELL_ASSIGNED, EVENT_BRANCH_ENTERED, EVENT_BACKTRACK,
+    EVENT_SOLUTION_FOUND,
+    TECHNIQUE_NAKED_SINGLE, TECHNIQUE_HIDDEN_SINGLE_BLOCK,
+    TECHNIQUE_HIDDEN_SINGLE_ROW, TECHNIQUE_HIDDEN_SINGLE_COLUMN,
+    TECHNIQUE_HIDDEN_SINGLE_REGION, TECHNIQUE_HIDDEN_SINGLE_DIAGONAL,
+    TECHNIQUE_HIDDEN_SINGLE_WINDOW, TECHNIQUE_SEARCH)
+
+""" Event sinks for the sudoku solver
+
+A trace file is a text file. The first line is "P" followed by the 81 values
+of the original sudoku (row by row, 0 for empty cells). Every other line is
+one solver event:
+    A<row><column><value><technique code> -- cell assigned
+    B<row><column><value> -- branch entered
+    K<row><column><value> -- backtrack
+    S -- solution found
+"""
+
+_EVENT_CODES = {
+    EVENT_CELL_ASSIGNED: "A",
+    EVENT_BRANCH_ENTERED: "B",
+    EVENT_BACKTRACK: "K",
+    EVENT_SOLUTION_FOUND: "S"}
+_EVENTS_FROM_CODES = dict((code, event) for event, code in _EVENT_CODES.items())
+
+_TECHNIQUE_CODES = {
+    TECHNIQUE_NAKED_SINGLE: "n",
+    TECHNIQUE_HIDDEN_SINGLE_BLOCK: "b",
+    TECHNIQUE_HIDDEN_SINGLE_ROW: "r",
+    TECHNIQUE_HIDDEN_SINGLE_COLUMN: "c",
+    TECHNIQUE_HIDDEN_SINGLE_REGION: "g",
+    TECHNIQUE_HIDDEN_SINGLE_DIAGONAL: "d",
+    TECHNIQUE_HIDDEN_SINGLE_WINDOW: "w",
+    TECHNIQUE_SEARCH: "s"}
+_TECHNIQUES_FROM_CODES = dict(
+    (code, technique) for technique, code in _TECHNIQUE_CODES.items())
+
+
+def _sudoku_to_str(sudoku_values):
+    """ Convert a sudoku into a string of 81 digits, 0 for empty cells
+    """
+    flag_empty_cells = (sudoku_values <= 0) | (sudoku_values >= 10)
+    return "".join(map(str, np.where(flag_empty_cells, 0, sudoku_values).ravel()))
+
+
+def trace_file_sink(trace_file, sudoku_values):
+    """ Create an event sink that writes a compact trace to an open file
+
+    Argument:
+        trace_file (file object, required) -- opened for writing, the caller is responsible for closing it
+        sudoku_values (9x9 ndarray, required) -- the sudoku about to be solved, written as the trace header
+
+    Return:
+        event sink to be passed to solve_sudoku (or solve_sudoku_greedy, solve_sudoku_combinatorial)
+    """
+    trace_file.write("P" + _sudoku_to_str(sudoku_values) + "\n")
+
+    def event_sink(event, row, column, value, technique):
+        if event == EVENT_SOLUTION_FOUND:
+            trace_file.write("S\n")
+        elif event == EVENT_CELL_ASSIGNED:
+            trace_file.write("A%d%d%d%s\n" % (
+                row, column, value, _TECHNIQUE_CODES[technique]))
+        else:
+            trace_file.write("%s%d%d%d\n" % (
+                _EVENT_CODES[event], row, column, value))
+
+    return event_sink
+
+
+def counting_sink():
+    """ Create an event sink that counts events by type
+
+    Return:
+        tuple (event_sink, counts), where counts is a dict from event to the
+        number of times it has been reported so far
+    """
+    counts = dict((event, 0) for event in _EVENT_CODES)
+
+    def event_sink(event, row, column, value, technique):
+        counts[event] += 1
+
+    return event_sink, counts
+
+
+def read_trace(trace_filename):
+    """ Read a trace file written by trace_file_sink
+
+    Argument:
+        trace_filename (str, required) -- trace file name
+
+    Return:
+        tuple (sudoku_values, events), where sudoku_values is the original
+        sudoku (9x9 ndarray) and events is a list of tuples
+        (event, row, column, value, technique)
+    """
+    with open(trace_filename) as trace_file:
+        header = trace_file.readline().strip()
+        if not header.startswith("P") or len(header) != 82:
+            raise ValueError(
+                "{} is not a sudoku trace file".format(trace_filename))
+        sudoku_values = np.array(map(int, header[1:]), dtype="i4").reshape((9, 9))
+
+        events = []
+        for line in trace_file:
+            line = line.strip()
+            if not line:
+                continue
+            event = _EVENTS_FROM_CODES[line[0]]
+            if event == EVENT_SOLUTION_FOUND:
+                events.append((event, None, None, None, None))
+                continue
+            row, column, value = int(line[1]), int(line[2]), int(line[3])
+            if event == EVENT_CELL_ASSIGNED:
+                technique = _TECHNIQUES_FROM_CODES[line[4]]
+            else:
+                technique = TECHNIQUE_SEARCH
+            events.append((event, row, column, value, technique))
+    return sudoku_values, events
+
+
+def replay_trace(trace_filename):
+    """ Replay a trace file offline, event by event
+
+    Argument:
+        trace_filename (str, required) -- trace file name
+
+    Return:
+        generator of tuples (event, row, column, value, technique, sudoku_values),
+        where sudoku_values (9x9 ndarray) is the state of the sudoku right
+        after the event. The same ndarray may be reused between events, copy
+        it if it needs to be kept.
+    """
+    sudoku_values, events = read_trace(trace_filename)
+
+    # # the solver copies the sudoku before each branch,
+    # # so a backtrack restores the copy made when the branch was entered
+    saved_sudoku_values = []
+    for event, row, column, value, technique in events:
+        if event == EVENT_BRANCH_ENTERED:
+            saved_sudoku_values.append(sudoku_values.copy())
+            sudoku_values[row, column] = value
+        elif event == EVENT_BACKTRACK:
+            sudoku_values = saved_sudoku_values.pop()
+        elif event == EVENT_CELL_ASSIGNED:
+            sudoku_values[row, column] = value
+        yield event, row, column, value, technique, sudoku_values
+
+
+def benchmark_disabled_hooks(sudoku_filenames, repeat=5):
+    """ Measure the cost of the event hooks when no event sink is attached
+
+    With no event sink, every hook is reduced to one "is not None" check.
+    With the default options of solve_sudoku, every check executed is one
+    event reported when a sink is attached (the hooks of the greedy search,
+    of the combinatorial search and of its propagation), so the cost is
+    estimated as the number of events times the measured cost of one check,
+    relative to the solve time. The measured overhead of a sink that does
+    nothing is reported as well, as an upper bound.
+
+    Argument:
+        sudoku_filenames (list of str, required) -- sudoku input files
+        repeat (int, optional) -- number of timing repetitions, the fastest is used
+
+    Return:
+        dict from file name to a dict with keys "solve_time", "number_of_checks",
+        "disabled_overhead" and "noop_sink_overhead" (fractions of solve_time)
+    """
+    timer = timeit.Timer("if event_sink is not None: pass",
+                         setup="event_sink = None")
+    number_of_timer_loops = 1000000
+    check_time = min(timer.repeat(repeat, number_of_timer_loops)) / \
+        number_of_timer_loops
+
+    def noop_sink(event, row, column, value, technique):
+        pass
+
+    results = {}
+    for sudoku_filename in sudoku_filenames:
+        sudoku_input = np.loadtxt(sudoku_filename, delimiter=",", dtype="i4")
+
+        def time_solve(event_sink):
+            best = None
+            for _ in range(repeat):
+                sudoku_values = sudoku_input.copy()
+                start = timeit.default_timer()
+                solve_sudoku(sudoku_values, event_sink=event_sink)
+                elapsed = timeit.default_timer() - start
+                if best is None or elapsed < best:
+                    best = elapsed
+            return best
+
+        solve_time = time_solve(None)
+        noop_sink_time = time_solve(noop_sink)
+
+        event_sink, counts = counting_sink()
+        solve_sudoku(sudoku_input.copy(), event_sink=event_sink)
+        # # the branches call solve_sudoku_combinatorial, not solve_sudoku, and
+        # # no hook of the default path is checked without reporting an event
+        number_of_checks = sum(counts.values())
+
+        results[sudoku_filename] = {
+            "solve_time": solve_time,
+            "number_of_checks": number_of_checks,
+            "disabled_overhead": number_of_checks * check_time / solve_time,
+            "noop_sink_overhead": (noop_sink_time - solve_time) / solve_time}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sudoku solver tracing")
+    subparsers = parser.add_subparsers(dest="command")
+
+    parser_record = subparsers.add_parser(
+        "record", help="Solve a sudoku and write its trace file")
+    parser_record.add_argument(
+        "-i", "--in-file", dest="in_filename",
+        help="Sudoku input filename", required=True)
+    parser_record.add_argument(
+        "-t", "--trace-file", dest="trace_filename",
+        help="Trace output filename", required=True)
+
+    parser_replay = subparsers.add_parser(
+        "replay", help="Replay a trace file")
+    parser_replay.add_argument(
+        "-t", "--trace-file", dest="trace_filename",
+        help="Trace input filename", required=True)
+
+    parser_benchmark = subparsers.add_parser(
+        "benchmark", help="Measure the cost of disabled event hooks")
+    parser_benchmark.add_argument(
+        "in_filenames", nargs="+", help="Sudoku input filenames")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        sudoku_values = np.loadtxt(args.in_filename, delimiter=",", dtype="i4")
+        with open(args.trace_filename, "w") as trace_file:
+            solve_sudoku(sudoku_values,
+                         event_sink=trace_file_sink(trace_file, sudoku_values))
+    elif args.command == "replay":
+        sudoku_values = None
+        for event, row, column, value, technique, sudoku_values in \
+                replay_trace(args.trace_filename):
+            if event == EVENT_SOLUTION_FOUND:
+                print "solution found"
+            else:
+                print "{} row {} column {} value {} ({})".format(
+                    event, row, column, value, technique)
+        if sudoku_values is not None:
+            pretty_print(sudoku_values)
+    elif args.command == "benchmark":
+        results = benchmark_disabled_hooks(args.in_filenames)
+        for sudoku_filename in args.in_filenames:
+            result = results[sudoku_filename]
+            print "{}: {:.1f} ms, {} hook checks, disabled {:.4%}, no-op sink {:.2%}".format(
+                sudoku_filename, result["solve_time"] * 1000,
+                result["number_of_checks"], result["disabled_overhead"],
+                result["noop_sink_overhead"])
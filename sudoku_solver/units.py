@@ -0,0 +1,143 @@
+import numpy as np
+
+""" Declarative units of a sudoku and its variants
+
+A unit is a group of 9 cells that must contain the numbers 1 to 9 once each.
+A classic sudoku has 27 units: 9 blocks, 9 rows and 9 columns. Variants add
+units (the two diagonals of an X-sudoku, the four extra windows of a windoku)
+or replace the blocks (the irregular regions of a jigsaw sudoku).
+
+Cells are numbered 0 - 80 (row * 9 + column).
+"""
+
+UNIT_BLOCK = "block"
+UNIT_ROW = "row"
+UNIT_COLUMN = "column"
+UNIT_REGION = "region"
+UNIT_DIAGONAL = "diagonal"
+UNIT_WINDOW = "window"
+
+# # variant names accepted by make_units and in the header of sudoku files
+VARIANT_DIAGONAL = "diagonal"
+VARIANT_WINDOKU = "windoku"
+
+
+class SudokuUnits(object):
+    """ Units of a sudoku, with the index from cells to units
+
+    Argument:
+        units (list of (str, list of int), required) -- kind and cells of every unit
+
+    Attributes:
+        units -- list of (kind, list of cells), in the given order
+        unit_rows_columns -- list of the (row, column) tuples of every unit
+        units_of_cell -- list of the unit numbers of every cell, in unit order
+        peers -- list of the other cells (ndarray) sharing a unit with every cell
+        incidence -- ndarray (number of units x 81), 1 where a cell belongs to a unit
+    """
+
+    def __init__(self, units):
+        for kind, cells in units:
+            if len(set(cells)) != 9 or min(cells) < 0 or max(cells) > 80:
+                raise ValueError(
+                    "A {} unit must have 9 different cells".format(kind))
+        self.units = [(kind, list(cells)) for kind, cells in units]
+        self.unit_rows_columns = [
+            [divmod(cell, 9) for cell in cells] for _, cells in self.units]
+        self.units_of_cell = [[] for _ in range(81)]
+        for unit_number, (_, cells) in enumerate(self.units):
+            for cell in cells:
+                self.units_of_cell[cell].append(unit_number)
+        self.peers = [
+            np.array(sorted(
+                set(peer for unit_number in self.units_of_cell[cell]
+                    for peer in self.units[unit_number][1]) - set([cell])))
+            for cell in range(81)]
+        self.incidence = np.zeros((len(self.units), 81), dtype="i4")
+        for unit_number, (_, cells) in enumerate(self.units):
+            self.incidence[unit_number, cells] = 1
+
+
+def make_units(regions=None, variants=()):
+    """ Units of a classic sudoku or of a variant
+
+    Argument:
+        regions (9x9 ndarray, optional) -- region number 0 - 8 of every cell,
+        replacing the 3x3 blocks (jigsaw sudoku)
+        variants (sequence of str, optional) -- VARIANT_DIAGONAL and/or VARIANT_WINDOKU
+
+    Return:
+        SudokuUnits, with the blocks (or regions) first, then the rows, the
+        columns, and the units of the variants
+    """
+    if regions is None:
+        units = [
+            (UNIT_BLOCK,
+             [row * 9 + column
+              for row in range(first_row, first_row + 3)
+              for column in range(first_column, first_column + 3)])
+            for first_row in range(0, 9, 3) for first_column in range(0, 9, 3)]
+    else:
+        regions = np.asarray(regions).ravel()
+        units = [(UNIT_REGION, list(np.where(regions == region)[0]))
+                 for region in range(9)]
+    units += [(UNIT_ROW, [row * 9 + column for column in range(9)])
+              for row in range(9)]
+    units += [(UNIT_COLUMN, [row * 9 + column for row in range(9)])
+              for column in range(9)]
+
+    for variant in variants:
+        if variant == VARIANT_DIAGONAL:
+            units.append((UNIT_DIAGONAL, [index * 9 + index for index in range(9)]))
+            units.append((UNIT_DIAGONAL, [index * 9 + 8 - index for index in range(9)]))
+        elif variant == VARIANT_WINDOKU:
+            units += [
+                (UNIT_WINDOW,
+                 [row * 9 + column
+                  for row in range(first_row, first_row + 3)
+                  for column in range(first_column, first_column + 3)])
+                for first_row in (1, 5) for first_column in (1, 5)]
+        else:
+            raise ValueError("Unknown sudoku variant {}".format(variant))
+    return SudokuUnits(units)
+
+
+# # units of a classic sudoku
+CLASSIC_UNITS = make_units()
+
+
+def load_sudoku(filename):
+    """ Load a sudoku csv file, classic or variant
+
+    A variant is described by comment lines at the top of the csv file, which
+    np.loadtxt ignores, so every sudoku file can still be read as a classic one:
+        # variant: diagonal windoku
+        # regions: <81 digits, region number 0 - 8 of every cell, row by row>
+
+    Argument:
+        filename (str, required) -- sudoku input filename
+
+    Return:
+        tuple (sudoku_values, units), a 9x9 ndarray and its SudokuUnits
+    """
+    regions = None
+    variants = []
+    with open(filename) as sudoku_file:
+        for line in sudoku_file:
+            line = line.strip()
+            if not line.startswith("#"):
+                continue
+            key, _, value = line[1:].partition(":")
+            key = key.strip()
+            if key == "variant":
+                variants.extend(value.split())
+            elif key == "regions":
+                regions = np.array(map(int, value.strip()), dtype="i4")
+                if regions.shape != (81,):
+                    raise ValueError(
+                        "{}: regions must have 81 digits".format(filename))
+
+    sudoku_values = np.loadtxt(filename, delimiter=",", dtype="i4")
+    if regions is None and not variants:
+        return sudoku_values, CLASSIC_UNITS
+    return sudoku_values, make_units(regions, variants)